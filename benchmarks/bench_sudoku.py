@@ -0,0 +1,137 @@
+"""
+Benchmark the solvers and generators against the bundled puzzle corpus and
+write the results as JSON for benchmarks/compare.py
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sudoku_board import Board
+from sudoku_game import SudokuGame
+from sudoku_metrics import percentile
+
+CORPUS_DIR = os.path.join(ROOT, "benchmarks", "corpus")
+CORPORA = ["easy", "hard", "pathological"]
+SOLVERS = ["bitmask", "dlx"]
+GENERATORS = ["transform", "backtracking"]
+DIFFICULTIES = ["easy", "medium", "hard", "expert"]
+# Latency targets, checked after every run: benchmark -> (metric, limit in ms)
+TARGETS = {"create_puzzle/expert": ("p99_ms", 50.0)}
+
+
+def load_corpus(name):
+    with open(os.path.join(CORPUS_DIR, f"{name}.txt")) as f:
+        return [Board.from_string(line) for line in f
+                if line.strip() and not line.startswith("#")]
+
+
+def summarize(samples):
+    total = sum(samples)
+    ordered = sorted(samples)
+    return {
+        "runs": len(samples),
+        "median_ms": percentile(ordered, 0.5) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "mean_ms": total / len(samples) * 1000,
+        "throughput_per_sec": len(samples) / total if total else 0.0,
+    }
+
+
+def time_calls(call, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_solve(solver, puzzles, repeat):
+    game = SudokuGame(solver=solver)
+    samples = []
+    for puzzle in puzzles:
+        for _ in range(repeat):
+            board = puzzle.copy()
+            start = time.perf_counter()
+            solved = game.solve_sudoku(board)
+            samples.append(time.perf_counter() - start)
+            if not solved:
+                raise RuntimeError(f"{solver} failed on {puzzle.to_string()}")
+    return samples
+
+
+def run_benchmarks(repeat, runs, only=None, seed=1234):
+    cases = []
+    for solver in SOLVERS:
+        for corpus in CORPORA:
+            cases.append((f"solve/{solver}/{corpus}",
+                          lambda s=solver, c=corpus: bench_solve(s, load_corpus(c), repeat)))
+    for generator in GENERATORS:
+        game = SudokuGame(generator=generator, rng=random.Random(seed))
+        cases.append((f"generate_complete_grid/{generator}",
+                      lambda g=game: time_calls(g.generate_complete_grid, runs)))
+    for difficulty in DIFFICULTIES:
+        game = SudokuGame(rng=random.Random(seed))
+        cases.append((f"create_puzzle/{difficulty}",
+                      lambda g=game, d=difficulty: time_calls(lambda: g.create_puzzle(d), runs)))
+
+    results = {}
+    for name, bench in cases:
+        if only and only not in name:
+            continue
+        results[name] = summarize(bench())
+        stats = results[name]
+        print(f"{name:38} median {stats['median_ms']:9.3f} ms  p99 {stats['p99_ms']:9.3f} ms  "
+              f"{stats['throughput_per_sec']:10.1f}/s", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", default=os.path.join(ROOT, "benchmarks", "results.json"))
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="solves per corpus puzzle")
+    parser.add_argument("--runs", type=int, default=200,
+                        help="calls per generation benchmark")
+    parser.add_argument("--quick", action="store_true",
+                        help="one solve per puzzle and 20 generation calls")
+    parser.add_argument("--only", help="run benchmarks whose name contains this text")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.repeat, args.runs = 1, 20
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+            "runs": args.runs,
+        },
+        "benchmarks": run_benchmarks(args.repeat, args.runs, args.only),
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.out}", file=sys.stderr)
+
+    missed = 0
+    for name, (metric, limit) in TARGETS.items():
+        stats = report["benchmarks"].get(name)
+        if stats is not None and stats[metric] > limit:
+            print(f"{name} {metric} {stats[metric]:.3f} ms misses its {limit:g} ms target",
+                  file=sys.stderr)
+            missed += 1
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
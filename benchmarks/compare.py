@@ -0,0 +1,76 @@
+"""
+Compare a benchmark results file against a stored baseline and exit with
+status 1 when any benchmark got slower by more than the threshold, or 2
+when either file is missing
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_results(path):
+    # None if the file does not exist yet
+    try:
+        with open(path) as f:
+            return json.load(f)["benchmarks"]
+    except FileNotFoundError:
+        return None
+
+
+def compare(baseline, current, metric="median_ms", threshold=0.10):
+    # Returns (name, baseline value, current value, relative change) rows and
+    # the names that regressed; benchmarks missing on either side are skipped
+    rows = []
+    regressions = []
+    for name in sorted(set(baseline) & set(current)):
+        before = baseline[name][metric]
+        after = current[name][metric]
+        change = (after - before) / before if before else 0.0
+        rows.append((name, before, after, change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("current", nargs="?",
+                        default=os.path.join(ROOT, "benchmarks", "results.json"))
+    parser.add_argument("--baseline", default=os.path.join(ROOT, "benchmarks", "baseline.json"))
+    parser.add_argument("--metric", choices=["median_ms", "p99_ms", "mean_ms"],
+                        default="median_ms")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed slowdown as a fraction (default: 0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    baseline = load_results(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; record one with\n"
+              f"  python benchmarks/bench_sudoku.py --out {args.baseline}", file=sys.stderr)
+        return 2
+    current = load_results(args.current)
+    if current is None:
+        print(f"No results at {args.current}; record them with\n"
+              f"  python benchmarks/bench_sudoku.py --out {args.current}", file=sys.stderr)
+        return 2
+    rows, regressions = compare(baseline, current, args.metric, args.threshold)
+
+    for name, before, after, change in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:38} {before:10.3f} -> {after:10.3f} {args.metric}  {change:+7.1%}{flag}")
+    for name in sorted(set(baseline) ^ set(current)):
+        side = "baseline" if name in baseline else "current run"
+        print(f"{name:38} only in {side}")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print(f"\nNo regressions above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
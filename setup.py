@@ -6,12 +6,29 @@ setup(
     description="A complete Sudoku game with GUI using Pygame",
     author="Sudoku Game Developer",
     packages=find_packages(),
+    py_modules=[
+        "sudoku_admission",
+        "sudoku_batch",
+        "sudoku_board",
+        "sudoku_cli",
+        "sudoku_game",
+        "sudoku_generator",
+        "sudoku_gui",
+        "sudoku_loadtest",
+        "sudoku_metrics",
+        "sudoku_pool",
+        "sudoku_pygame",
+        "sudoku_sessions",
+        "sudoku_solver",
+        "sudoku_web",
+    ],
     install_requires=[
         "pygame>=2.6.0",
     ],
     entry_points={
         'console_scripts': [
             'sudoku-game=sudoku_pygame:main',
+            'sudoku=sudoku_cli:main',
         ],
     },
     python_requires=">=3.8",
@@ -0,0 +1,78 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class RateLimiter:
+    # A token bucket per client: `burst` requests at once, refilled at `rate`
+    # per second. Buckets are kept in least-recently-used order and the
+    # oldest dropped past `max_clients`, since a dropped bucket only hands
+    # that client a fresh burst.
+
+    def __init__(self, rate=2.0, burst=10, max_clients=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.clock = clock
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def acquire(self, client):
+        # Returns 0 if the request may go ahead, otherwise the seconds until
+        # the client's next token
+        now = self.clock()
+        with self.lock:
+            bucket = self.buckets.get(client)
+            if bucket is None:
+                tokens = self.burst
+                while len(self.buckets) >= self.max_clients:
+                    self.buckets.popitem(last=False)
+            else:
+                tokens, last = bucket
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                self.buckets.move_to_end(client)
+            if tokens >= 1:
+                self.buckets[client] = (tokens - 1, now)
+                return 0.0
+            self.buckets[client] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+class WorkQueue:
+    # Admits at most `max_active` jobs at a time with up to `max_waiting`
+    # more queued behind them. acquire() returns False straight away when
+    # the queue is full, or after `timeout` seconds without a free slot.
+
+    def __init__(self, max_active=2, max_waiting=16):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiting = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, timeout=None):
+        with self.condition:
+            if self.active < self.max_active:
+                self.active += 1
+                return True
+            if self.waiting >= self.max_waiting:
+                return False
+            self.waiting += 1
+            try:
+                if not self.condition.wait_for(lambda: self.active < self.max_active, timeout):
+                    return False
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            return True
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify()
+
+
+def retry_after(seconds):
+    # Retry-After takes whole seconds
+    return str(max(1, math.ceil(seconds)))
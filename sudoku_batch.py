@@ -0,0 +1,159 @@
+import os
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from itertools import islice
+from sudoku_board import Board
+from sudoku_game import SudokuGame
+import sudoku_solver
+
+
+def generate_chunk(difficulty, count, seed):
+    # Every chunk gets its own RNG stream, derived from the batch seed
+    game = SudokuGame(rng=random.Random(seed))
+    return [game.create_puzzle(difficulty).to_string(".") for _ in range(count)]
+
+
+def generate_puzzles(count, difficulty="medium", workers=None, seed=None, chunk_size=64):
+    # Yields puzzle strings as soon as their chunk finishes. Only a couple of
+    # chunks per worker are in flight, so memory does not grow with count.
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    workers = workers or os.cpu_count() or 1
+    chunks = (
+        (difficulty, min(chunk_size, count - start), f"{seed}:{index}")
+        for index, start in enumerate(range(0, count, chunk_size))
+    )
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from generate_chunk(*chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in chunks:
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+            pending.add(executor.submit(generate_chunk, *chunk))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def solve_line(text, solver="bitmask"):
+    try:
+        board = Board.from_string(text)
+    except ValueError:
+        return "invalid", None
+    if not sudoku_solver.solve_sudoku(board, solver):
+        return "unsolvable", None
+    return "solved", board.to_string()
+
+
+def solve_chunk(start, lines, solver="bitmask"):
+    return start, [solve_line(text, solver) for text in lines]
+
+
+def validate_line(text, game):
+    # "valid" is a complete grid with no repeats, "incomplete" has blanks
+    # but no repeats and "conflict" repeats a digit in some unit
+    try:
+        board = Board.from_string(text)
+    except ValueError:
+        return "invalid", None
+    game.load_grid(board)
+    if game.conflicts:
+        return "conflict", None
+    if game.empty_cells:
+        return "incomplete", None
+    return "valid", None
+
+
+def validate_chunk(start, lines):
+    game = SudokuGame()
+    return start, [validate_line(text, game) for text in lines]
+
+
+def read_chunks(lines, chunk_size):
+    # Blank lines are skipped; every other line counts as one puzzle
+    puzzles = (line.strip() for line in lines)
+    puzzles = (text for text in puzzles if text)
+    start = 0
+    while True:
+        chunk = list(islice(puzzles, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def solve_stream(lines, workers=None, ordered=True, solver="bitmask", chunk_size=256,
+                 executor=None):
+    # Yields (index, status, solution) for every puzzle line, where status is
+    # "solved", "unsolvable" or "invalid" and solution is an 81-digit string
+    # or None. Input is read lazily and at most two chunks per worker are in
+    # flight, so memory stays flat for inputs of any size.
+    task = partial(solve_chunk, solver=solver)
+    return run_stream(task, lines, workers, ordered, chunk_size, executor)
+
+
+def validate_stream(lines, workers=None, ordered=True, chunk_size=256, executor=None):
+    # Like solve_stream, with the statuses from validate_line and no solution
+    return run_stream(validate_chunk, lines, workers, ordered, chunk_size, executor)
+
+
+def run_stream(task, lines, workers, ordered, chunk_size, executor):
+    chunks = read_chunks(lines, chunk_size)
+
+    if executor is None and workers == 1:
+        for start, chunk in chunks:
+            yield from chunk_results(*task(start, chunk))
+        return
+
+    workers = workers or os.cpu_count() or 1
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        if ordered:
+            yield from run_ordered(executor, chunks, workers * 2, task)
+        else:
+            yield from run_unordered(executor, chunks, workers * 2, task)
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+def chunk_results(start, results):
+    for offset, (status, solution) in enumerate(results):
+        yield start + offset, status, solution
+
+
+def run_ordered(executor, chunks, window, task):
+    pending = deque()
+    for start, chunk in chunks:
+        if len(pending) >= window:
+            yield from chunk_results(*pending.popleft().result())
+        pending.append(executor.submit(task, start, chunk))
+    while pending:
+        yield from chunk_results(*pending.popleft().result())
+
+
+def run_unordered(executor, chunks, window, task):
+    pending = set()
+    for start, chunk in chunks:
+        if len(pending) >= window:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from chunk_results(*future.result())
+        pending.add(executor.submit(task, start, chunk))
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield from chunk_results(*future.result())
@@ -0,0 +1,98 @@
+# bytes.translate tables between cell values 0-9 and ASCII digits; '.' is
+# accepted as a blank on input
+DIGIT_TEXT = bytes(range(48, 58)) + bytes(246)
+TEXT_DIGIT = b"\xff" * 46 + b"\x00\xff" + bytes(range(10)) + b"\xff" * 198
+
+
+class Board:
+    # 81 cells in one bytearray, row-major, 0 for empty. board[row][col]
+    # reads and writes through a memoryview so code written against nested
+    # lists keeps working; board[row, col] skips the view for hot paths.
+    __slots__ = ("cells",)
+
+    def __init__(self, cells=None):
+        if cells is None:
+            self.cells = bytearray(81)
+        else:
+            self.cells = bytearray(cells)
+            if len(self.cells) != 81:
+                raise ValueError("A board needs exactly 81 cells")
+
+    @classmethod
+    def from_rows(cls, rows):
+        if isinstance(rows, Board):
+            return rows.copy()
+        return cls(value for row in rows for value in row)
+
+    @classmethod
+    def from_string(cls, text):
+        # 81 characters, row-major, with '0' or '.' for blanks
+        if isinstance(text, str):
+            text = text.encode("ascii")
+        cells = text.strip().translate(TEXT_DIGIT)
+        if len(cells) != 81 or max(cells) > 9:
+            raise ValueError("A board string needs 81 characters of 1-9, 0 or '.'")
+        return cls(cells)
+
+    def to_string(self, blank="0"):
+        text = bytes(self.cells).translate(DIGIT_TEXT).decode()
+        if blank != "0":
+            text = text.replace("0", blank)
+        return text
+
+    @classmethod
+    def unpack(cls, data):
+        # Inverse of pack()
+        if len(data) != 41:
+            raise ValueError("A packed board needs exactly 41 bytes")
+        cells = bytearray(82)
+        cells[0::2] = bytes(byte >> 4 for byte in data)
+        cells[1::2] = bytes(byte & 15 for byte in data)
+        if cells[81] or max(cells) > 9:
+            raise ValueError("A packed board holds cell values 0-9")
+        return cls(cells[:81])
+
+    def pack(self):
+        # Two cells per byte, high nibble first: 41 bytes for 81 cells
+        cells = self.cells
+        return bytes((high << 4) | low for high, low in zip(cells[0::2], cells[1::2] + b"\0"))
+
+    def to_rows(self):
+        cells = self.cells
+        return [list(cells[r * 9:r * 9 + 9]) for r in range(9)]
+
+    def copy(self):
+        return Board(self.cells)
+
+    def empty_count(self):
+        return self.cells.count(0)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            row, col = key
+            return self.cells[row * 9 + col]
+        return memoryview(self.cells)[key * 9:key * 9 + 9]
+
+    def __setitem__(self, key, value):
+        row, col = key
+        self.cells[row * 9 + col] = value
+
+    def __len__(self):
+        return 9
+
+    def __iter__(self):
+        view = memoryview(self.cells)
+        for r in range(9):
+            yield view[r * 9:r * 9 + 9]
+
+    def __eq__(self, other):
+        if not isinstance(other, Board):
+            return NotImplemented
+        return self.cells == other.cells
+
+    def __hash__(self):
+        # Boards are mutable; only hash ones that are no longer being edited
+        return hash(bytes(self.cells))
+
+    def __repr__(self):
+        return f"<Board {self.to_string()}>"
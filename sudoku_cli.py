@@ -0,0 +1,137 @@
+import argparse
+import sys
+import time
+import sudoku_batch
+from sudoku_pool import DIFFICULTIES
+
+
+def open_output(path):
+    if path == "-":
+        return sys.stdout
+    return open(path, "w")
+
+
+def open_input(path):
+    if path == "-":
+        return sys.stdin
+    return open(path)
+
+
+def run_generate(args):
+    out = open_output(args.out)
+    start = time.perf_counter()
+    produced = 0
+    try:
+        for puzzle in sudoku_batch.generate_puzzles(args.count, args.difficulty,
+                                                    workers=args.workers, seed=args.seed):
+            out.write(puzzle + "\n")
+            produced += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    rate = produced / elapsed if elapsed else 0.0
+    print(f"Generated {produced} {args.difficulty} puzzles in {elapsed:.2f}s "
+          f"({rate:.1f} puzzles/sec)", file=sys.stderr)
+    return 0
+
+
+def run_solve(args):
+    source = open_input(args.input)
+    out = open_output(args.out)
+    start = time.perf_counter()
+    counts = {"solved": 0, "unsolvable": 0, "invalid": 0}
+    try:
+        results = sudoku_batch.solve_stream(source, workers=args.workers,
+                                            ordered=not args.unordered, solver=args.solver)
+        for index, status, solution in results:
+            counts[status] += 1
+            line = solution if status == "solved" else status
+            if args.unordered:
+                line = f"{index}\t{line}"
+            out.write(line + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    rate = total / elapsed if elapsed else 0.0
+    print(f"Solved {counts['solved']} of {total} puzzles in {elapsed:.2f}s "
+          f"({rate:.1f} puzzles/sec, {counts['unsolvable']} unsolvable, "
+          f"{counts['invalid']} invalid)", file=sys.stderr)
+    return 0 if counts["solved"] == total else 1
+
+
+def add_loadtest_arguments(parser):
+    # Shared with sudoku_loadtest's own entry point, so the CLI can offer
+    # the command without importing the load generator and web server
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None,
+                        help="target a running server (default: start one in-process)")
+    parser.add_argument("--players", type=int, default=50, help="concurrent simulated players")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--requests", type=int, default=None,
+                        help="stop after this many requests, or at --duration if sooner")
+    parser.add_argument("--new-game-ratio", type=float, default=0.05,
+                        help="chance that a request starts a new game instead of a move")
+    parser.add_argument("--difficulty", choices=DIFFICULTIES, default="medium")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=32,
+                        help="in-process server: request handler threads")
+    parser.add_argument("--pool-size", type=int, default=20,
+                        help="in-process server: ready puzzles per difficulty, 0 to disable")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+
+
+def run_loadtest(args):
+    # Imported here: the load generator pulls in asyncio and the web server
+    import sudoku_loadtest
+    return sudoku_loadtest.run_loadtest(args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="sudoku", description="Sudoku batch tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Generate puzzles in parallel")
+    generate.add_argument("--count", type=int, default=100)
+    generate.add_argument("--difficulty", choices=["easy", "medium", "hard", "expert"],
+                          default="medium")
+    generate.add_argument("--workers", type=int, default=None,
+                          help="worker processes (default: one per CPU)")
+    generate.add_argument("--seed", type=int, default=None,
+                          help="base seed for reproducible batches")
+    generate.add_argument("--out", default="-", help="output file (default: stdout)")
+    generate.set_defaults(handler=run_generate)
+
+    solve = commands.add_parser("solve", help="Solve a file of 81-character puzzles")
+    solve.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    solve.add_argument("--out", default="-", help="output file (default: stdout)")
+    solve.add_argument("--workers", type=int, default=None,
+                       help="worker processes (default: one per CPU)")
+    solve.add_argument("--unordered", action="store_true",
+                       help="write 'index<TAB>solution' lines as soon as they are ready")
+    solve.add_argument("--solver", choices=["bitmask", "dlx"], default="bitmask")
+    solve.set_defaults(handler=run_solve)
+
+    loadtest = commands.add_parser(
+        "loadtest", help="Drive the web API with simulated players",
+        description="Start the web server in-process, or target --port, and report "
+                    "throughput and latency percentiles")
+    add_loadtest_arguments(loadtest)
+    loadtest.set_defaults(handler=run_loadtest)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,51 @@
 import random
-import copy
+import time
+import sudoku_generator
+import sudoku_solver
+from sudoku_board import Board
+
+# Greedy clue removal passes per unique puzzle before settling for the
+# sparsest one found, and the seconds after which retries are cut short
+REMOVAL_ATTEMPTS = 10
+RETRY_BUDGET = 0.03
 
 class SudokuGame:
-    def __init__(self):
-        self.grid = [[0 for _ in range(9)] for _ in range(9)]
-        self.solution = [[0 for _ in range(9)] for _ in range(9)]
+    def __init__(self, solver="bitmask", generator="transform", rng=None):
+        self.solver = solver
+        self.generator = generator
+        self.rng = rng or random
+        self.solution = Board()
+        self.load_grid(Board())
+    
+    def load_grid(self, grid, solution=None):
+        self.grid = Board.from_rows(grid)
+        if solution is not None:
+            self.solution = Board.from_rows(solution)
+        self.rebuild_masks()
+    
+    def rebuild_masks(self):
+        # Bit d-1 of a mask is set when digit d occupies that row/column/box.
+        # conflicts counts duplicate placements in a loaded grid, which
+        # make_move itself can never introduce.
+        self.row_masks = [0] * 9
+        self.col_masks = [0] * 9
+        self.box_masks = [0] * 9
+        self.empty_cells = 0
+        self.conflicts = 0
+        
+        cells = self.grid.cells
+        for i in range(81):
+            num = cells[i]
+            if num == 0:
+                self.empty_cells += 1
+                continue
+            row, col = divmod(i, 9)
+            box = (row // 3) * 3 + col // 3
+            bit = 1 << (num - 1)
+            for masks, index in ((self.row_masks, row), (self.col_masks, col), (self.box_masks, box)):
+                if masks[index] & bit:
+                    self.conflicts += 1
+                masks[index] |= bit
         
     def is_valid_move(self, grid, row, col, num):
         for x in range(9):
@@ -19,62 +60,168 @@ class SudokuGame:
                     return False
         return True
     
-    def solve_sudoku(self, grid):
+    def solve_sudoku(self, grid, solver=None, stats=None):
+        # stats: optional sudoku_solver.SolverStats record to accumulate into
+        solver = solver or self.solver
+        if solver != "backtracking":
+            return sudoku_solver.solve_sudoku(grid, solver, stats)
+        if stats is None:
+            return self.solve_backtracking(grid)
+        
+        start = time.perf_counter()
+        solved = self.solve_backtracking(grid, stats)
+        stats.wall_time += time.perf_counter() - start
+        return solved
+    
+    def count_solutions(self, grid, limit=2, solver=None, stats=None, exclude=None):
+        # exclude: optional (cell index, digit) that an empty cell may not take
+        solver = solver or self.solver
+        if solver == "backtracking":
+            solver = "bitmask"
+        return sudoku_solver.count_solutions(grid, limit, solver, stats, exclude)
+    
+    def solve_backtracking(self, grid, stats=None, depth=0):
+        if stats is not None:
+            stats.nodes += 1
+            stats.max_depth = max(stats.max_depth, depth)
+        
         for i in range(9):
             for j in range(9):
                 if grid[i][j] == 0:
                     for num in range(1, 10):
+                        if stats is not None:
+                            stats.candidates_tested += 1
                         if self.is_valid_move(grid, i, j, num):
                             grid[i][j] = num
-                            if self.solve_sudoku(grid):
+                            if self.solve_backtracking(grid, stats, depth + 1):
                                 return True
                             grid[i][j] = 0
+                            if stats is not None:
+                                stats.backtracks += 1
                     return False
         return True
     
-    def generate_complete_grid(self):
-        grid = [[0 for _ in range(9)] for _ in range(9)]
-        
-        def fill_grid(grid):
-            for i in range(9):
-                for j in range(9):
-                    if grid[i][j] == 0:
-                        numbers = list(range(1, 10))
-                        random.shuffle(numbers)
-                        for num in numbers:
-                            if self.is_valid_move(grid, i, j, num):
-                                grid[i][j] = num
-                                if fill_grid(grid):
-                                    return True
-                                grid[i][j] = 0
-                        return False
-            return True
+    def generate_complete_grid(self, generator=None, stats=None):
+        generator = generator or self.generator
+        if generator not in ("transform", "backtracking"):
+            raise ValueError(f"Unknown generator: {generator}")
+        if stats is not None:
+            start = time.perf_counter()
+        
+        if generator == "transform":
+            board = sudoku_generator.transformed_grid(self.rng)
+        else:
+            grid = [[0 for _ in range(9)] for _ in range(9)]
+            self.fill_grid(grid, stats)
+            board = Board.from_rows(grid)
         
-        fill_grid(grid)
-        return grid
+        if stats is not None:
+            stats.wall_time += time.perf_counter() - start
+        return board
     
-    def create_puzzle(self, difficulty="medium"):
-        complete_grid = self.generate_complete_grid()
-        self.solution = copy.deepcopy(complete_grid)
-        puzzle = copy.deepcopy(complete_grid)
+    def fill_grid(self, grid, stats=None, depth=0):
+        if stats is not None:
+            stats.nodes += 1
+            stats.max_depth = max(stats.max_depth, depth)
+        
+        for i in range(9):
+            for j in range(9):
+                if grid[i][j] == 0:
+                    numbers = list(range(1, 10))
+                    self.rng.shuffle(numbers)
+                    for num in numbers:
+                        if stats is not None:
+                            stats.candidates_tested += 1
+                        if self.is_valid_move(grid, i, j, num):
+                            grid[i][j] = num
+                            if self.fill_grid(grid, stats, depth + 1):
+                                return True
+                            grid[i][j] = 0
+                            if stats is not None:
+                                stats.backtracks += 1
+                    return False
+        return True
+    
+    def removal_keeps_unique(self, puzzle, row, col, value, stats=None):
+        # puzzle was unique before (row, col) was blanked, so it stays unique
+        # exactly when no solution puts another digit in that cell. That
+        # holds outright when its peers already show every other digit;
+        # otherwise one search with `value` ruled out there decides it.
+        index = row * 9 + col
+        cells = puzzle.cells
+        if len({cells[i] for i in sudoku_solver.PEERS[index]} - {0, value}) == 8:
+            return True
+        return self.count_solutions(puzzle, 1, stats=stats, exclude=(index, value)) == 0
+    
+    def create_puzzle(self, difficulty="medium", unique=True, solution=None, stats=None,
+                      deadline=None):
+        # stats collects the generator and every uniqueness check; its
+        # wall_time is the time spent inside those calls. deadline is a
+        # time.perf_counter() value; once it passes, TimeoutError is raised
+        # before the new puzzle is loaded.
+        started = time.perf_counter()
+        if solution is None:
+            solution = self.generate_complete_grid(stats=stats)
+        self.solution = Board.from_rows(solution)
+        puzzle = self.solution.copy()
         
         difficulty_levels = {
             "easy": 35,
             "medium": 45,
             "hard": 55,
-            "expert": 65
+            "expert": 58
         }
         
         cells_to_remove = difficulty_levels.get(difficulty, 45)
         
         cells = [(i, j) for i in range(9) for j in range(9)]
-        random.shuffle(cells)
+        self.rng.shuffle(cells)
         
-        for i, j in cells[:cells_to_remove]:
-            puzzle[i][j] = 0
+        if unique:
+            # Remove clues one at a time, putting back any whose removal
+            # makes the puzzle ambiguous. A pass that runs out of removable
+            # clues short of the target (a minimal puzzle keeps 22-27 clues)
+            # is retried with a fresh cell order, up to REMOVAL_ATTEMPTS
+            # times or until RETRY_BUDGET seconds have gone by, and the
+            # sparsest puzzle found is kept. Once the deadline passes, that
+            # best puzzle is used, or TimeoutError raised if no pass has
+            # finished yet.
+            retry_until = started + RETRY_BUDGET
+            best = None
+            for attempt in range(REMOVAL_ATTEMPTS):
+                if attempt:
+                    puzzle = self.solution.copy()
+                    self.rng.shuffle(cells)
+                removed = 0
+                for i, j in cells:
+                    if removed == cells_to_remove:
+                        break
+                    now = time.perf_counter()
+                    if deadline is not None and now > deadline:
+                        if best is None:
+                            raise TimeoutError("Puzzle generation ran past its deadline")
+                        break
+                    if attempt and now > retry_until:
+                        break
+                    value = puzzle[i, j]
+                    puzzle[i, j] = 0
+                    if self.removal_keeps_unique(puzzle, i, j, value, stats):
+                        removed += 1
+                    else:
+                        puzzle[i, j] = value
+                if best is None or removed > best[0]:
+                    best = (removed, puzzle)
+                now = time.perf_counter()
+                if removed == cells_to_remove or now > retry_until or (
+                        deadline is not None and now > deadline):
+                    break
+            puzzle = best[1]
+        else:
+            for i, j in cells[:cells_to_remove]:
+                puzzle[i, j] = 0
         
-        self.grid = puzzle
-        return puzzle
+        self.load_grid(puzzle)
+        return self.grid
     
     def print_grid(self, grid=None):
         if grid is None:
@@ -101,37 +248,55 @@ class SudokuGame:
         print("  " + "-" * 37)
     
     def make_move(self, row, col, num):
-        if self.grid[row][col] != 0:
+        error = self.try_move(row, col, num)
+        if error == "filled":
             print("This cell is already filled!")
-            return False
-        
-        if not self.is_valid_move(self.grid, row, col, num):
+        elif error == "conflict":
             print("Invalid move! This number conflicts with Sudoku rules.")
+        return error is None
+    
+    def try_move(self, row, col, num):
+        # make_move without the console output: places num and returns None,
+        # or returns why it could not, "filled" or "conflict"
+        if self.grid[row, col] != 0:
+            return "filled"
+        
+        box = (row // 3) * 3 + col // 3
+        bit = 1 << (num - 1)
+        if (self.row_masks[row] | self.col_masks[col] | self.box_masks[box]) & bit:
+            return "conflict"
+        
+        self.grid[row, col] = num
+        self.row_masks[row] |= bit
+        self.col_masks[col] |= bit
+        self.box_masks[box] |= bit
+        self.empty_cells -= 1
+        return None
+    
+    def clear_cell(self, row, col):
+        num = self.grid[row, col]
+        if num == 0:
             return False
         
-        self.grid[row][col] = num
+        self.grid[row, col] = 0
+        if self.conflicts:
+            # A duplicated digit may still occupy this unit elsewhere
+            self.rebuild_masks()
+            return True
+        
+        box = (row // 3) * 3 + col // 3
+        bit = 1 << (num - 1)
+        self.row_masks[row] &= ~bit
+        self.col_masks[col] &= ~bit
+        self.box_masks[box] &= ~bit
+        self.empty_cells += 1
         return True
     
     def is_complete(self):
-        for i in range(9):
-            for j in range(9):
-                if self.grid[i][j] == 0:
-                    return False
-        return True
+        return self.empty_cells == 0
     
     def is_valid_solution(self):
-        for i in range(9):
-            for j in range(9):
-                if self.grid[i][j] == 0:
-                    return False
-                
-                temp = self.grid[i][j]
-                self.grid[i][j] = 0
-                if not self.is_valid_move(self.grid, i, j, temp):
-                    self.grid[i][j] = temp
-                    return False
-                self.grid[i][j] = temp
-        return True
+        return self.empty_cells == 0 and self.conflicts == 0
 
 def main():
     game = SudokuGame()
@@ -0,0 +1,51 @@
+import random
+from itertools import permutations
+from operator import itemgetter
+from sudoku_board import Board
+
+# Solved grids the transformations start from. Each one spans an orbit of
+# about 1.2e12 distinct grids, so a handful is plenty for puzzle banks.
+SEED_GRIDS = [
+    "197542863524368197836971254463185729719426538285739416351894672678253941942617385",
+    "456192738728543916139687452874369125291875643563421897645218379317956284982734561",
+    "465378291973241568182956437317462859649785312528139674296813745834597126751624983",
+    "263158479195437682478629351629371548851264937734895216986513724517942863342786195",
+]
+
+SEED_CELLS = [bytes(int(ch) for ch in text) for text in SEED_GRIDS]
+
+TRIPLE_ORDERS = list(permutations(range(3)))
+
+
+def random_line_order(rng):
+    # Shuffle the three bands (or stacks), then the lines inside each one
+    return [
+        band * 3 + line
+        for band in TRIPLE_ORDERS[rng.randrange(6)]
+        for line in TRIPLE_ORDERS[rng.randrange(6)]
+    ]
+
+
+def transform_cells(cells, rng=random):
+    # Row swaps within bands, column swaps within stacks, band and stack
+    # swaps, an optional transpose and a digit relabelling all keep a grid
+    # valid. Rotations and reflections are compositions of these, so they
+    # need no separate step.
+    rows = random_line_order(rng)
+    cols = random_line_order(rng)
+    if rng.random() < 0.5:
+        positions = [r * 9 + c for r in rows for c in cols]
+    else:
+        positions = [c * 9 + r for r in rows for c in cols]
+
+    labels = bytes([0] + rng.sample(range(1, 10), 9)) + bytes(246)
+    return bytes(itemgetter(*positions)(cells)).translate(labels)
+
+
+def transformed_grid(rng=random, seeds=SEED_CELLS):
+    return Board(transform_cells(rng.choice(seeds), rng))
+
+
+def generate_grids(count, rng=random, seeds=SEED_CELLS):
+    for _ in range(count):
+        yield transformed_grid(rng, seeds)
@@ -1,10 +1,115 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox, font
 from sudoku_game import SudokuGame
-import copy
+
+BOARD_STYLES = ("canvas", "widgets")
+CELL_SIZE = 52
+BOX_LINE_WIDTH = 3
+# Options a cell accepts from configure(), with the canvas item option each maps to
+CELL_OPTIONS = {'text': 'text', 'fg': 'fill', 'bg': 'fill'}
+
+
+class CanvasCell:
+    # Stands in for a cell Label on a CanvasBoard: configure() takes the
+    # same text, fg and bg options and queues them on the board
+    __slots__ = ('board', 'row', 'col')
+    
+    def __init__(self, board, row, col):
+        self.board = board
+        self.row = row
+        self.col = col
+    
+    def configure(self, **options):
+        for name in options:
+            if name not in CELL_OPTIONS:
+                raise tk.TclError(f'unknown option "-{name}"')
+        self.board.queue(self.row, self.col, options)
+    
+    config = configure
+
+
+class CanvasBoard(tk.Canvas):
+    # The whole grid on one canvas, with a rectangle and a text item per
+    # cell. Cell changes are queued and applied together from one idle
+    # callback, and only options that differ from what is shown reach Tk,
+    # so a loop of configure() calls over the board costs a single pass.
+    
+    def __init__(self, master, colors, on_click, cell_size=CELL_SIZE):
+        self.margin = BOX_LINE_WIDTH // 2 + 1
+        self.cell_size = cell_size
+        size = 9 * cell_size + 2 * self.margin
+        super().__init__(master, width=size, height=size, bg=colors['grid_bg'],
+                         highlightthickness=0, cursor='hand2')
+        self.on_click = on_click
+        self.pending = {}
+        self.flush_id = None
+        
+        cell_font = ('Arial', 16, 'bold')
+        self.rects = []
+        self.texts = []
+        self.shown = []
+        for row in range(9):
+            for col in range(9):
+                x = self.margin + col * cell_size
+                y = self.margin + row * cell_size
+                self.rects.append(self.create_rectangle(x, y, x + cell_size, y + cell_size,
+                                                        fill=colors['grid_bg'],
+                                                        outline=colors['border_thin']))
+                self.texts.append(self.create_text(x + cell_size // 2, y + cell_size // 2, text="",
+                                                   fill=colors['text_fixed'], font=cell_font))
+                self.shown.append({'text': "", 'fg': colors['text_fixed'], 'bg': colors['grid_bg']})
+        
+        # 3x3 box lines go on top of the cell outlines
+        for i in range(0, 10, 3):
+            offset = self.margin + i * cell_size
+            end = self.margin + 9 * cell_size
+            self.create_line(offset, self.margin, offset, end,
+                             width=BOX_LINE_WIDTH, fill=colors['border_thick'])
+            self.create_line(self.margin, offset, end, offset,
+                             width=BOX_LINE_WIDTH, fill=colors['border_thick'])
+        
+        self.cells = [[CanvasCell(self, row, col) for col in range(9)] for row in range(9)]
+        self.bind("<Button-1>", self.click)
+    
+    def queue(self, row, col, options):
+        self.pending.setdefault(row * 9 + col, {}).update(options)
+        if self.flush_id is None:
+            self.flush_id = self.after_idle(self.flush)
+    
+    def flush(self):
+        # Applies every queued change; safe to call directly to draw now
+        if self.flush_id is not None:
+            self.after_cancel(self.flush_id)
+            self.flush_id = None
+        pending, self.pending = self.pending, {}
+        for index, options in pending.items():
+            shown = self.shown[index]
+            changed = {name: value for name, value in options.items() if shown[name] != value}
+            if not changed:
+                continue
+            shown.update(changed)
+            if 'bg' in changed:
+                self.itemconfigure(self.rects[index], fill=changed.pop('bg'))
+            if changed:
+                self.itemconfigure(self.texts[index],
+                                   **{CELL_OPTIONS[name]: value for name, value in changed.items()})
+    
+    def click(self, event):
+        col = (event.x - self.margin) // self.cell_size
+        row = (event.y - self.margin) // self.cell_size
+        if 0 <= row < 9 and 0 <= col < 9:
+            self.on_click(row, col)
+
 
 class SudokuGUI:
-    def __init__(self, root):
+    # board="canvas" draws the grid on a single CanvasBoard; "widgets" uses
+    # a Label per cell. Both expose self.cells[row][col].configure().
+    
+    def __init__(self, root, board="canvas"):
+        if board not in BOARD_STYLES:
+            raise ValueError(f"Unknown board style: {board}")
+        self.board_style = board
         self.root = root
         self.root.title("Sudoku Game")
         self.root.geometry("800x900")
@@ -109,6 +214,12 @@ class SudokuGUI:
         self.status_label.pack(pady=10)
         
     def create_grid(self):
+        if self.board_style == "canvas":
+            self.board = CanvasBoard(self.grid_frame, self.colors, self.select_cell)
+            self.board.pack()
+            self.cells = self.board.cells
+            return
+        
         for i in range(9):
             row = []
             for j in range(9):
@@ -183,7 +294,7 @@ class SudokuGUI:
     def new_game(self):
         difficulty = self.difficulty_var.get()
         self.game.create_puzzle(difficulty)
-        self.original_grid = copy.deepcopy(self.game.grid)
+        self.original_grid = self.game.grid.copy()
         self.selected_cell = None
         
         # Update display
@@ -196,7 +307,7 @@ class SudokuGUI:
                 else:
                     self.cells[i][j].configure(text="", bg=self.colors['grid_bg'])
         
-        empty_cells = sum(1 for i in range(9) for j in range(9) if self.game.grid[i][j] == 0)
+        empty_cells = self.game.grid.empty_count()
         self.status_label.configure(text=f"New {difficulty} puzzle generated! {empty_cells} empty cells.")
     
     def clear_cell(self):
@@ -212,7 +323,7 @@ class SudokuGUI:
             return
         
         # Clear the cell
-        self.game.grid[row][col] = 0
+        self.game.clear_cell(row, col)
         self.cells[row][col].configure(text="")
         self.update_cell_color(row, col)
         self.status_label.configure(text=f"Cleared cell ({row+1}, {col+1})")
@@ -245,9 +356,14 @@ class SudokuGUI:
             
             self.status_label.configure(text="Complete solution displayed")
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sudoku game (Tkinter)")
+    parser.add_argument("--board", choices=BOARD_STYLES, default="canvas",
+                        help="draw the grid on one canvas or with a widget per cell")
+    args = parser.parse_args(argv)
+    
     root = tk.Tk()
-    app = SudokuGUI(root)
+    app = SudokuGUI(root, board=args.board)
     root.mainloop()
 
 if __name__ == "__main__":
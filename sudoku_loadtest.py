@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import base64
+import json
+import random
+import sys
+import threading
+import time
+from sudoku_board import Board
+from sudoku_cli import add_loadtest_arguments as add_arguments
+from sudoku_metrics import percentile
+from sudoku_pool import DIFFICULTIES, PuzzlePool
+import sudoku_web
+
+
+class Connection:
+    # One kept-alive HTTP/1.1 connection. Responses from the API always
+    # carry a Content-Length, so no chunked decoding is needed.
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode() if body is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n")
+        try:
+            self.writer.write(head.encode() + data)
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+            if not status_line:
+                raise ConnectionError("connection closed by server")
+            status = int(status_line.split()[1])
+
+            length = 0
+            close = False
+            while True:
+                line = await self.reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                name = name.strip().lower()
+                if name == "content-length":
+                    length = int(value)
+                elif name == "connection" and value.strip().lower() == "close":
+                    close = True
+            payload = await self.reader.readexactly(length)
+        except Exception:
+            self.close()
+            raise
+        if close:
+            self.close()
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {"new_game": [], "make_move": []}
+        self.errors = {"new_game": 0, "make_move": 0}
+
+    def report(self, elapsed):
+        requests = sum(len(samples) for samples in self.latencies.values())
+        errors = sum(self.errors.values())
+        operations = {}
+        for name, samples in self.latencies.items():
+            samples.sort()
+            operations[name] = {
+                "count": len(samples),
+                "errors": self.errors[name],
+                "p50_ms": percentile(samples, 0.50) * 1000 if samples else None,
+                "p95_ms": percentile(samples, 0.95) * 1000 if samples else None,
+                "p99_ms": percentile(samples, 0.99) * 1000 if samples else None,
+                "max_ms": samples[-1] * 1000 if samples else None,
+            }
+        return {
+            "duration_s": elapsed,
+            "requests": requests,
+            "errors": errors,
+            "error_rate": errors / requests if requests else 0.0,
+            "throughput_per_sec": requests / elapsed if elapsed else 0.0,
+            "operations": operations,
+        }
+
+
+async def player(connection, options, rng, recorder, budget, deadline):
+    # Plays one game after another: fills blanks from the solution, and
+    # starts over early with probability new_game_ratio per request
+    game_id = None
+    moves = []
+    while time.perf_counter() < deadline:
+        if budget is not None:
+            if budget[0] <= 0:
+                break
+            budget[0] -= 1
+
+        if game_id is None or not moves or rng.random() < options.new_game_ratio:
+            name = "new_game"
+            path = "/api/new_game?format=packed"
+            body = {"difficulty": options.difficulty}
+        else:
+            name = "make_move"
+            path = "/api/make_move"
+            row, col, num = moves.pop()
+            body = {"gameId": game_id, "row": row, "col": col, "num": num}
+
+        start = time.perf_counter()
+        try:
+            status, payload = await connection.request("POST", path, body)
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            status, payload = None, b""
+        recorder.latencies[name].append(time.perf_counter() - start)
+        if status != 200:
+            recorder.errors[name] += 1
+            if name == "make_move":
+                game_id = None
+            continue
+
+        if name == "new_game":
+            data = json.loads(payload)
+            grid = Board.unpack(base64.b64decode(data["grid"]))
+            solution = Board.unpack(base64.b64decode(data["solution"]))
+            game_id = data["gameId"]
+            moves = [(i // 9, i % 9, solution.cells[i]) for i in range(81) if not grid.cells[i]]
+            rng.shuffle(moves)
+    connection.close()
+
+
+async def drive(host, port, options):
+    recorder = Recorder()
+    budget = [options.requests] if options.requests else None
+    start = time.perf_counter()
+    deadline = start + options.duration
+    seed = options.seed if options.seed is not None else random.randrange(2 ** 32)
+    await asyncio.gather(*(
+        player(Connection(host, port), options, random.Random(f"{seed}:{index}"),
+               recorder, budget, deadline)
+        for index in range(options.players)
+    ))
+    return recorder.report(time.perf_counter() - start)
+
+
+def start_local_server(options):
+    # The server shares this process (and its GIL) with the load generator,
+    # which is fine for comparing changes; use --port for absolute numbers
+    pool = PuzzlePool(size=options.pool_size) if options.pool_size > 0 else None
+    # Every simulated player shares one address, so per-client rate limiting is off
+    server = sudoku_web.SudokuHTTPServer(("127.0.0.1", 0), sudoku_web.SudokuWebServer,
+                                         workers=options.workers, pool=pool, rate_limit=0)
+    if pool is not None:
+        pool.start()
+        pool.wait_until_full(timeout=60)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, pool
+
+
+def run(options):
+    server = pool = None
+    host, port = options.host, options.port
+    if port is None:
+        server, pool = start_local_server(options)
+        host, port = server.server_address
+    try:
+        report = asyncio.run(drive(host, port, options))
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        if pool is not None:
+            pool.stop()
+
+    report["config"] = {
+        "target": "in-process" if server is not None else f"{host}:{port}",
+        "players": options.players,
+        "duration": options.duration,
+        "requests": options.requests,
+        "new_game_ratio": options.new_game_ratio,
+        "difficulty": options.difficulty,
+        "workers": options.workers if server is not None else None,
+        "pool_size": options.pool_size if server is not None else None,
+    }
+    return report
+
+
+def print_report(report, out=sys.stderr):
+    print(f"{report['requests']} requests in {report['duration_s']:.2f}s "
+          f"({report['throughput_per_sec']:.1f}/s), {report['errors']} errors "
+          f"({report['error_rate']:.2%})", file=out)
+    for name, stats in report["operations"].items():
+        if not stats["count"]:
+            continue
+        print(f"  {name:10} {stats['count']:7} requests  p50 {stats['p50_ms']:8.2f} ms  "
+              f"p95 {stats['p95_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  "
+              f"max {stats['max_ms']:8.2f} ms", file=out)
+
+
+def run_loadtest(args):
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Sudoku web API")
+    add_arguments(parser)
+    return run_loadtest(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
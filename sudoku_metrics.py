@@ -0,0 +1,208 @@
+import math
+import threading
+from bisect import bisect_left
+
+# Seconds; suits request handling from sub-millisecond moves to slow generation
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=""):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def percentile(samples, fraction):
+    # Nearest-rank percentile over sorted samples
+    rank = max(1, math.ceil(fraction * len(samples)))
+    return samples[rank - 1]
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    # Series are keyed by a tuple of label values given positionally in the
+    # order of `labels`. One lock per metric keeps updates cheap and safe
+    # from any handler thread.
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            series = sorted(self.series.items())
+        for values, value in series:
+            lines.extend(self.render_series(values, value))
+        return lines
+
+    def render_series(self, values, value):
+        return [f"{self.name}{format_labels(self.labels, values)} {format_value(value)}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *values, amount=1):
+        with self.lock:
+            self.series[values] = self.series.get(values, 0) + amount
+
+    def value(self, *values):
+        return self.series.get(values, 0)
+
+
+class Gauge(Metric):
+    # A gauge either holds values set by the caller or, when `function` is
+    # given, reads its single unlabelled value at scrape time
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), function=None):
+        super().__init__(name, help_text, labels)
+        self.function = function
+
+    def set(self, value, *values):
+        with self.lock:
+            self.series[values] = value
+
+    def inc(self, *values, amount=1):
+        with self.lock:
+            self.series[values] = self.series.get(values, 0) + amount
+
+    def dec(self, *values, amount=1):
+        self.inc(*values, amount=-amount)
+
+    def value(self, *values):
+        if self.function is not None:
+            return self.function()
+        return self.series.get(values, 0)
+
+    def render(self):
+        if self.function is not None:
+            with self.lock:
+                self.series[()] = self.function()
+        return super().render()
+
+
+class Histogram(Metric):
+    # Each series is [count per bucket..., count above the last bucket,
+    # sum, total count]; buckets are made cumulative only when rendered
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, amount, *values):
+        slot = bisect_left(self.buckets, amount)
+        with self.lock:
+            series = self.series.get(values)
+            if series is None:
+                series = self.series[values] = [0] * (len(self.buckets) + 3)
+            series[slot] += 1
+            series[-2] += amount
+            series[-1] += 1
+
+    def count(self, *values):
+        series = self.series.get(values)
+        return series[-1] if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            series = sorted((values, list(counts)) for values, counts in self.series.items())
+        for values, counts in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = format_labels(self.labels, values, f'le="{format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {format_value(counts[-2])}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=(), function=None):
+        return self.register(Gauge(name, help_text, labels, function))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        # Prometheus text exposition format, version 0.0.4
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class AccessLog:
+    # Request log lines are queued in memory and written in batches, either
+    # once `max_lines` are waiting or every `flush_interval` seconds from a
+    # background thread, so handlers never block on the log stream.
+
+    def __init__(self, stream, flush_interval=1.0, max_lines=1000):
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self.max_lines = max_lines
+        self.lines = []
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self.flush_loop, name="access-log", daemon=True)
+        self.thread.start()
+
+    def write(self, line):
+        with self.lock:
+            self.lines.append(line)
+            if len(self.lines) < self.max_lines:
+                return
+            lines, self.lines = self.lines, []
+        self.write_lines(lines)
+
+    def flush(self):
+        with self.lock:
+            lines, self.lines = self.lines, []
+        self.write_lines(lines)
+
+    def write_lines(self, lines):
+        if lines:
+            with self.write_lock:
+                self.stream.write("".join(lines))
+                self.stream.flush()
+
+    def flush_loop(self):
+        while not self.closed.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self.closed.set()
+        self.thread.join()
+        self.flush()
@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from sudoku_board import Board
+from sudoku_game import SudokuGame
+from sudoku_solver import SolverStats
+
+DIFFICULTIES = ["easy", "medium", "hard", "expert"]
+
+
+class PuzzlePool:
+    # Keeps up to `size` ready puzzles per difficulty. get() is a deque pop;
+    # a background thread tops a difficulty back up to `size` whenever it
+    # drops below `low_water`. Entries are (puzzle, solution) byte strings.
+    # If set, on_generate(difficulty, seconds, stats) is called after each
+    # puzzle the refill thread makes.
+
+    def __init__(self, size=20, low_water=None, difficulties=DIFFICULTIES, path=None):
+        self.size = size
+        self.low_water = size // 2 if low_water is None else low_water
+        self.path = path
+        self.pools = {difficulty: deque() for difficulty in difficulties}
+        self.served = dict.fromkeys(difficulties, 0)
+        self.misses = dict.fromkeys(difficulties, 0)
+        self.generated = 0
+        self.refill_seconds = 0.0
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.thread = None
+        self.game = SudokuGame()
+        self.on_generate = None
+
+    def start(self):
+        if self.path and os.path.exists(self.path):
+            self.load(self.path)
+        self.stopping = False
+        self.thread = threading.Thread(target=self.refill_loop, name="puzzle-pool", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.path:
+            self.save(self.path)
+
+    def get(self, difficulty):
+        # Returns (puzzle, solution) Boards, or None when the pool is empty
+        with self.condition:
+            pool = self.pools.get(difficulty)
+            if not pool:
+                if pool is not None:
+                    self.misses[difficulty] += 1
+                    self.condition.notify()
+                return None
+            puzzle, solution = pool.popleft()
+            self.served[difficulty] += 1
+            if len(pool) < self.low_water:
+                self.condition.notify()
+        return Board(puzzle), Board(solution)
+
+    def generate(self, difficulty, stats=None):
+        puzzle = self.game.create_puzzle(difficulty, stats=stats)
+        return bytes(puzzle.cells), bytes(self.game.solution.cells)
+
+    def next_refill(self):
+        # Caller holds the condition. Picks the emptiest pool below low water.
+        low = [(len(pool), difficulty) for difficulty, pool in self.pools.items()
+               if len(pool) < self.low_water or (not pool and self.size)]
+        return min(low)[1] if low else None
+
+    def refill_loop(self):
+        while True:
+            with self.condition:
+                difficulty = self.next_refill()
+                while difficulty is None and not self.stopping:
+                    self.condition.wait()
+                    difficulty = self.next_refill()
+                if self.stopping:
+                    return
+
+            # Fill this difficulty back to size, checking for shutdown between
+            # puzzles; generation itself runs without holding the lock
+            while True:
+                on_generate = self.on_generate
+                stats = SolverStats() if on_generate is not None else None
+                start = time.perf_counter()
+                entry = self.generate(difficulty, stats)
+                elapsed = time.perf_counter() - start
+                if on_generate is not None:
+                    on_generate(difficulty, elapsed, stats)
+                with self.condition:
+                    pool = self.pools[difficulty]
+                    pool.append(entry)
+                    self.generated += 1
+                    self.refill_seconds += elapsed
+                    if self.stopping or len(pool) >= self.size:
+                        break
+
+    def wait_until_full(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(len(pool) < self.size for pool in self.pools.values()):
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self):
+        with self.condition:
+            return {
+                "depth": {difficulty: len(pool) for difficulty, pool in self.pools.items()},
+                "size": self.size,
+                "low_water": self.low_water,
+                "served": dict(self.served),
+                "misses": dict(self.misses),
+                "generated": self.generated,
+                "refill_rate": self.generated / self.refill_seconds if self.refill_seconds else 0.0,
+            }
+
+    def save(self, path):
+        with self.condition:
+            data = {
+                difficulty: [[Board(p).to_string(), Board(s).to_string()] for p, s in pool]
+                for difficulty, pool in self.pools.items()
+            }
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    def load(self, path):
+        with open(path) as f:
+            data = json.load(f)
+        with self.condition:
+            for difficulty, entries in data.items():
+                if difficulty not in self.pools:
+                    continue
+                pool = self.pools[difficulty]
+                for puzzle, solution in entries[:self.size - len(pool)]:
+                    pool.append((bytes(Board.from_string(puzzle).cells),
+                                 bytes(Board.from_string(solution).cells)))
@@ -1,7 +1,14 @@
-import pygame
+import argparse
+import contextlib
+import io
+import os
+import random
 import sys
+import time
+from collections import deque
+import pygame
 from sudoku_game import SudokuGame
-import copy
+from sudoku_metrics import percentile
 
 # Initialize Pygame
 pygame.init()
@@ -27,8 +34,75 @@ PURPLE = (156, 39, 176)
 RED = (244, 67, 54)
 DARK_GRAY = (64, 64, 64)
 
+# Frame rate cap while something is animating; when idle the loop sleeps
+# until the next event
+ANIMATION_FPS = 60
+FLASH_DURATION = 400  # ms an invalid move keeps its cell flashing red
+PROFILER_REFRESH = 500  # ms between profiler overlay updates while idle
+
+INSTRUCTIONS_Y = GRID_OFFSET_Y + GRID_SIZE + 30
+STATUS_RECT = pygame.Rect(50, GRID_OFFSET_Y + GRID_SIZE + 200, WINDOW_WIDTH - 100, 40)
+PROFILER_RECT = pygame.Rect(WINDOW_WIDTH - 330, INSTRUCTIONS_Y, 300, 130)
+
+# Events after which the window contents may have been lost
+EXPOSE_EVENTS = {pygame.VIDEORESIZE, pygame.VIDEOEXPOSE}
+if hasattr(pygame, "WINDOWEXPOSED"):
+    EXPOSE_EVENTS.update((pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED))
+
+
+class FrameProfiler:
+    # Keeps the work time of the last `window` frames, and how much of each
+    # went to the named sections. Waiting for events is not counted, so an
+    # idle window shows a low FPS but honest frame times.
+    SECTIONS = ('handle_events', 'draw_grid', 'draw_buttons')
+    
+    def __init__(self, window=240):
+        self.frame_times = deque(maxlen=window)
+        self.frame_ends = deque(maxlen=window)
+        self.sections = {name: deque(maxlen=window) for name in self.SECTIONS}
+        self.current = dict.fromkeys(self.SECTIONS, 0.0)
+        self.frame_start = None
+    
+    def start_frame(self):
+        self.frame_start = time.perf_counter()
+    
+    def add(self, section, seconds):
+        self.current[section] += seconds
+    
+    def end_frame(self):
+        end = time.perf_counter()
+        self.frame_times.append(end - self.frame_start)
+        self.frame_ends.append(end)
+        for name, seconds in self.current.items():
+            self.sections[name].append(seconds)
+            self.current[name] = 0.0
+    
+    def stats(self):
+        # Times in milliseconds; section times are means per frame
+        frames = len(self.frame_times)
+        if not frames:
+            return None
+        samples = sorted(self.frame_times)
+        span = self.frame_ends[-1] - self.frame_ends[0]
+        return {
+            "frames": frames,
+            "fps": (frames - 1) / span if span else 0.0,
+            "p50_ms": percentile(samples, 0.50) * 1000,
+            "p95_ms": percentile(samples, 0.95) * 1000,
+            "p99_ms": percentile(samples, 0.99) * 1000,
+            "max_ms": samples[-1] * 1000,
+            "sections_ms": {name: sum(times) / frames * 1000
+                            for name, times in self.sections.items()},
+        }
+
 class SudokuPygame:
-    def __init__(self):
+    # With dirty_rects on, draw() only repaints cells and screen regions
+    # marked dirty since the last frame and passes their rectangles to
+    # pygame.display.update. Setting selected_cell, status_message or
+    # difficulty marks what they affect; call invalidate() after anything
+    # that changes the whole window, such as colours or fonts.
+    
+    def __init__(self, dirty_rects=True):
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Sudoku Game")
         
@@ -36,11 +110,21 @@ class SudokuPygame:
         self.font_large = pygame.font.Font(None, 32)
         self.font_medium = pygame.font.Font(None, 24)
         self.font_small = pygame.font.Font(None, 20)
+        self.font_title = pygame.font.Font(None, 48)
+        
+        self.dirty_rects = dirty_rects
+        self.full_redraw = True
+        self.dirty_cells = set()
+        self.dirty_regions = set()
+        self.flashes = {}
+        self.profiler = FrameProfiler()
+        self.show_profiler = False
         
         self.game = SudokuGame()
-        self.selected_cell = None
+        self._selected_cell = None
+        self._status_message = ""
+        self._difficulty = "medium"
         self.original_grid = None
-        self.difficulty = "medium"
         self.status_message = "Press 'N' for New Game, arrow keys to select, number keys to input"
         
         # Button rectangles
@@ -54,18 +138,139 @@ class SudokuPygame:
             'solution': pygame.Rect(670, 50, 80, 40)
         }
         
+        # Screen areas that are repainted as a unit, with their draw methods.
+        # Title and instructions are part of the background layer.
+        buttons_rect = pygame.Rect(self.buttons['new_game']).unionall(list(self.buttons.values()))
+        self.regions = {
+            'buttons': (buttons_rect, self.draw_buttons),
+            'status': (STATUS_RECT, self.draw_status),
+            'profiler': (PROFILER_RECT, self.draw_profiler),
+        }
+        
+        self.build_layers()
         self.running = True
+    
+    @property
+    def selected_cell(self):
+        return self._selected_cell
+    
+    @selected_cell.setter
+    def selected_cell(self, cell):
+        if self._selected_cell is not None:
+            self.dirty_cells.add(self._selected_cell)
+        if cell is not None:
+            self.dirty_cells.add(cell)
+        self._selected_cell = cell
+    
+    @property
+    def status_message(self):
+        return self._status_message
+    
+    @status_message.setter
+    def status_message(self, message):
+        if message != self._status_message:
+            self.dirty_regions.add('status')
+        self._status_message = message
+    
+    @property
+    def difficulty(self):
+        return self._difficulty
+    
+    @difficulty.setter
+    def difficulty(self, difficulty):
+        if difficulty != self._difficulty:
+            self.dirty_regions.add('buttons')
+        self._difficulty = difficulty
+    
+    def mark_cell(self, row, col):
+        self.dirty_cells.add((row, col))
+    
+    def mark_grid(self):
+        self.dirty_cells.update((row, col) for row in range(9) for col in range(9))
+    
+    def invalidate(self):
+        # Rebuild every cached surface, e.g. after changing colours or fonts
+        self.build_layers()
+        self.full_redraw = True
+    
+    def build_layers(self):
+        # Everything that does not change between frames is rendered once:
+        # digit glyphs and button faces on first use, and two layers. The
+        # background holds the title, the instructions and an empty grid;
+        # the grid-lines overlay holds only the cell borders and box lines,
+        # so a repainted cell gets its lines back with a single blit.
+        self.glyphs = {}
+        self.button_faces = {}
+        self.status_surface = None
+        
+        self.grid_lines = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+        for row in range(9):
+            for col in range(9):
+                pygame.draw.rect(self.grid_lines, GRAY, self.cell_rect(row, col), 1)
+        for row in range(9):
+            for col in range(9):
+                rect = self.cell_rect(row, col)
+                x, y, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+                if row % 3 == 0:
+                    pygame.draw.line(self.grid_lines, BLACK, (x, y), (right, y), 3)
+                if row % 3 == 2:
+                    pygame.draw.line(self.grid_lines, BLACK, (x, bottom), (right, bottom), 3)
+                if col % 3 == 0:
+                    pygame.draw.line(self.grid_lines, BLACK, (x, y), (x, bottom), 3)
+                if col % 3 == 2:
+                    pygame.draw.line(self.grid_lines, BLACK, (right, y), (right, bottom), 3)
+        self.grid_lines = self.grid_lines.convert_alpha()
+        
+        self.background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        self.background.fill(WHITE)
+        self.draw_title(self.background)
+        self.draw_instructions(self.background)
+        self.background.blit(self.grid_lines, (0, 0))
+    
+    def cell_rect(self, row, col):
+        return pygame.Rect(GRID_OFFSET_X + col * CELL_SIZE, GRID_OFFSET_Y + row * CELL_SIZE,
+                           CELL_SIZE, CELL_SIZE)
+    
+    def glyph(self, number, color):
+        key = (number, color)
+        surface = self.glyphs.get(key)
+        if surface is None:
+            surface = self.glyphs[key] = self.font_large.render(str(number), True, color)
+        return surface
+        
+    def handle_events(self, events=None):
+        start = time.perf_counter()
+        for event in pygame.event.get() if events is None else events:
+            self.handle_event(event)
+        self.profiler.add('handle_events', time.perf_counter() - start)
+    
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.running = False
         
-    def handle_events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-            
-            elif event.type == pygame.KEYDOWN:
-                self.handle_keydown(event)
-            
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                self.handle_mouse_click(event.pos)
+        elif event.type in EXPOSE_EVENTS:
+            self.full_redraw = True
+        
+        elif event.type == pygame.KEYDOWN:
+            self.handle_keydown(event)
+        
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.handle_mouse_click(event.pos)
+    
+    def flash_cell(self, row, col):
+        self.flashes[(row, col)] = pygame.time.get_ticks()
+        self.mark_cell(row, col)
+    
+    def animating(self):
+        return bool(self.flashes)
+    
+    def update_animations(self):
+        # Flashing cells are redrawn every frame until their flash ends
+        now = pygame.time.get_ticks()
+        for cell, start in list(self.flashes.items()):
+            if now - start >= FLASH_DURATION:
+                del self.flashes[cell]
+            self.dirty_cells.add(cell)
     
     def handle_keydown(self, event):
         # Number input (1-9)
@@ -88,6 +293,11 @@ class SudokuPygame:
         elif event.key == pygame.K_RIGHT:
             self.move_selection(1, 0)
         
+        # Profiler overlay
+        elif event.key == pygame.K_F3:
+            self.show_profiler = not self.show_profiler
+            self.dirty_regions.add('profiler')
+        
         # Clear cell
         elif event.key in [pygame.K_DELETE, pygame.K_BACKSPACE, pygame.K_0]:
             self.clear_cell()
@@ -177,6 +387,7 @@ class SudokuPygame:
         
         # Make the move
         if self.game.make_move(row, col, number):
+            self.mark_cell(row, col)
             self.status_message = f"Placed {number} in cell ({row+1}, {col+1})"
             
             # Check for win
@@ -184,6 +395,7 @@ class SudokuPygame:
                 if self.game.is_valid_solution():
                     self.status_message = "🎉 Congratulations! You solved the puzzle!"
         else:
+            self.flash_cell(row, col)
             self.status_message = f"Invalid move! {number} conflicts with Sudoku rules."
     
     def clear_cell(self):
@@ -203,15 +415,17 @@ class SudokuPygame:
             return
         
         # Clear the cell
-        self.game.grid[row][col] = 0
+        self.game.clear_cell(row, col)
+        self.mark_cell(row, col)
         self.status_message = f"Cleared cell ({row+1}, {col+1})"
     
     def new_game(self):
         self.game.create_puzzle(self.difficulty)
-        self.original_grid = copy.deepcopy(self.game.grid)
+        self.original_grid = self.game.grid.copy()
         self.selected_cell = (0, 0)
+        self.mark_grid()
         
-        empty_cells = sum(1 for i in range(9) for j in range(9) if self.game.grid[i][j] == 0)
+        empty_cells = self.game.grid.empty_count()
         self.status_message = f"New {self.difficulty} puzzle generated! {empty_cells} empty cells."
     
     def get_hint(self):
@@ -237,58 +451,52 @@ class SudokuPygame:
             self.status_message = "Please start a new game first!"
             return
         
-        self.game.grid = copy.deepcopy(self.game.solution)
+        self.game.load_grid(self.game.solution)
+        self.mark_grid()
         self.status_message = "Complete solution displayed"
     
     def draw_grid(self):
-        # Draw grid background
-        grid_rect = pygame.Rect(GRID_OFFSET_X, GRID_OFFSET_Y, GRID_SIZE, GRID_SIZE)
-        pygame.draw.rect(self.screen, WHITE, grid_rect)
-        
-        # Draw cells
+        # The background already shows empty white cells
         for row in range(9):
             for col in range(9):
-                x = GRID_OFFSET_X + col * CELL_SIZE
-                y = GRID_OFFSET_Y + row * CELL_SIZE
-                cell_rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-                
-                # Cell background color
-                if self.selected_cell == (row, col):
-                    pygame.draw.rect(self.screen, LIGHT_BLUE, cell_rect)
-                elif self.original_grid and self.original_grid[row][col] != 0:
-                    pygame.draw.rect(self.screen, LIGHT_GRAY, cell_rect)
-                else:
-                    pygame.draw.rect(self.screen, WHITE, cell_rect)
-                
-                # Cell border
-                border_width = 1
-                if row % 3 == 0:  # Top border of 3x3 boxes
-                    pygame.draw.line(self.screen, BLACK, (x, y), (x + CELL_SIZE, y), 3)
-                if col % 3 == 0:  # Left border of 3x3 boxes
-                    pygame.draw.line(self.screen, BLACK, (x, y), (x, y + CELL_SIZE), 3)
-                if row == 8:  # Bottom border
-                    pygame.draw.line(self.screen, BLACK, (x, y + CELL_SIZE), (x + CELL_SIZE, y + CELL_SIZE), 3)
-                if col == 8:  # Right border
-                    pygame.draw.line(self.screen, BLACK, (x + CELL_SIZE, y), (x + CELL_SIZE, y + CELL_SIZE), 3)
-                
-                pygame.draw.rect(self.screen, GRAY, cell_rect, border_width)
-                
-                # Draw number
-                if self.game.grid and self.game.grid[row][col] != 0:
-                    number = str(self.game.grid[row][col])
-                    
-                    # Color based on whether it's original or user input
-                    if self.original_grid and self.original_grid[row][col] != 0:
-                        color = BLACK  # Fixed numbers
-                    else:
-                        color = BLUE  # User input
-                    
-                    text_surface = self.font_large.render(number, True, color)
-                    text_rect = text_surface.get_rect(center=cell_rect.center)
-                    self.screen.blit(text_surface, text_rect)
+                if (self.selected_cell == (row, col) or self.game.grid[row, col]
+                        or (self.original_grid and self.original_grid[row, col])
+                        or (row, col) in self.flashes):
+                    self.draw_cell(row, col)
+    
+    def draw_cell(self, row, col):
+        # Returns the screen area touched, which includes the half of any
+        # 3x3 box line that spills over into the neighbouring cells
+        cell_rect = self.cell_rect(row, col)
+        fixed = self.original_grid and self.original_grid[row, col] != 0
+        
+        # Cell background color
+        if self.selected_cell == (row, col):
+            color = LIGHT_BLUE
+        elif fixed:
+            color = LIGHT_GRAY
+        else:
+            color = WHITE
+        flash_start = self.flashes.get((row, col))
+        if flash_start is not None:
+            # Fade from red back to the normal background
+            fade = min(1.0, (pygame.time.get_ticks() - flash_start) / FLASH_DURATION)
+            color = pygame.Color(RED).lerp(color, fade)
+        self.screen.fill(color, cell_rect)
+        
+        # Cell border and 3x3 box lines
+        area = cell_rect.inflate(4, 4)
+        self.screen.blit(self.grid_lines, area, area)
+        
+        # Fixed numbers in black, user input in blue
+        number = self.game.grid[row, col]
+        if number:
+            text_surface = self.glyph(number, BLACK if fixed else BLUE)
+            self.screen.blit(text_surface, text_surface.get_rect(center=cell_rect.center))
+        
+        return area
     
     def draw_buttons(self):
-        # Draw buttons
         for button_name, rect in self.buttons.items():
             # Button color
             if button_name == 'new_game':
@@ -300,16 +508,25 @@ class SudokuPygame:
             elif button_name == 'solution':
                 color = PURPLE
             
-            pygame.draw.rect(self.screen, color, rect)
-            pygame.draw.rect(self.screen, BLACK, rect, 2)
+            self.screen.blit(self.button_face(button_name, color), rect)
+    
+    def button_face(self, button_name, color):
+        key = (button_name, color)
+        face = self.button_faces.get(key)
+        if face is None:
+            rect = self.buttons[button_name]
+            face = pygame.Surface(rect.size).convert()
+            local = face.get_rect()
+            pygame.draw.rect(face, color, local)
+            pygame.draw.rect(face, BLACK, local, 2)
             
-            # Button text
             text = button_name.replace('_', ' ').title()
             text_surface = self.font_small.render(text, True, WHITE)
-            text_rect = text_surface.get_rect(center=rect.center)
-            self.screen.blit(text_surface, text_rect)
+            face.blit(text_surface, text_surface.get_rect(center=local.center))
+            self.button_faces[key] = face
+        return face
     
-    def draw_instructions(self):
+    def draw_instructions(self, surface):
         instructions = [
             "Keyboard Controls:",
             "• Arrow keys: Navigate cells",
@@ -320,46 +537,184 @@ class SudokuPygame:
             "• S: Show solution"
         ]
         
-        y_start = GRID_OFFSET_Y + GRID_SIZE + 30
+        y_start = INSTRUCTIONS_Y
         for i, instruction in enumerate(instructions):
             text_surface = self.font_small.render(instruction, True, DARK_GRAY)
-            self.screen.blit(text_surface, (50, y_start + i * 25))
+            surface.blit(text_surface, (50, y_start + i * 25))
     
     def draw_status(self):
-        status_rect = pygame.Rect(50, GRID_OFFSET_Y + GRID_SIZE + 200, WINDOW_WIDTH - 100, 40)
+        status_rect = STATUS_RECT
         pygame.draw.rect(self.screen, LIGHT_GRAY, status_rect)
         pygame.draw.rect(self.screen, GRAY, status_rect, 2)
         
-        text_surface = self.font_medium.render(self.status_message, True, BLACK)
+        # The message text is only re-rendered when it changes
+        if self.status_surface is None or self.status_surface[0] != self.status_message:
+            self.status_surface = (self.status_message,
+                                   self.font_medium.render(self.status_message, True, BLACK))
+        text_surface = self.status_surface[1]
         text_rect = text_surface.get_rect(center=status_rect.center)
         self.screen.blit(text_surface, text_rect)
     
-    def draw_title(self):
+    def draw_profiler(self):
+        if not self.show_profiler:
+            return
+        stats = self.profiler.stats()
+        pygame.draw.rect(self.screen, DARK_GRAY, PROFILER_RECT)
+        if stats is None:
+            lines = ["Profiler: no frames yet"]
+        else:
+            lines = [
+                f"FPS {stats['fps']:.1f} over {stats['frames']} frames",
+                f"frame p50 {stats['p50_ms']:.2f}  p95 {stats['p95_ms']:.2f} ms",
+                f"      p99 {stats['p99_ms']:.2f}  max {stats['max_ms']:.2f} ms",
+            ]
+            lines.extend(f"{name} {ms:.3f} ms" for name, ms in stats['sections_ms'].items())
+        for i, line in enumerate(lines):
+            text_surface = self.font_small.render(line, True, WHITE)
+            self.screen.blit(text_surface, (PROFILER_RECT.x + 10, PROFILER_RECT.y + 8 + i * 19))
+    
+    def draw_title(self, surface):
         title_text = "🧩 SUDOKU GAME"
-        title_surface = pygame.font.Font(None, 48).render(title_text, True, DARK_GRAY)
+        title_surface = self.font_title.render(title_text, True, DARK_GRAY)
         title_rect = title_surface.get_rect(center=(WINDOW_WIDTH // 2, 25))
-        self.screen.blit(title_surface, title_rect)
+        surface.blit(title_surface, title_rect)
     
     def draw(self):
-        self.screen.fill(WHITE)
-        self.draw_title()
-        self.draw_buttons()
-        self.draw_grid()
-        self.draw_instructions()
-        self.draw_status()
-        pygame.display.flip()
+        if self.full_redraw or not self.dirty_rects:
+            self.screen.blit(self.background, (0, 0))
+            start = time.perf_counter()
+            self.draw_buttons()
+            after_buttons = time.perf_counter()
+            self.draw_grid()
+            self.profiler.add('draw_buttons', after_buttons - start)
+            self.profiler.add('draw_grid', time.perf_counter() - after_buttons)
+            self.draw_status()
+            self.draw_profiler()
+            pygame.display.flip()
+            self.full_redraw = False
+            self.dirty_cells.clear()
+            self.dirty_regions.clear()
+            return
+        
+        if not self.dirty_cells and not self.dirty_regions:
+            return
+        
+        updated = []
+        for name in self.dirty_regions:
+            rect, draw_region = self.regions[name]
+            self.screen.set_clip(rect)
+            self.screen.blit(self.background, rect, rect)
+            start = time.perf_counter()
+            draw_region()
+            if name == 'buttons':
+                self.profiler.add('draw_buttons', time.perf_counter() - start)
+            self.screen.set_clip(None)
+            updated.append(rect)
+        start = time.perf_counter()
+        for row, col in self.dirty_cells:
+            updated.append(self.draw_cell(row, col))
+        self.profiler.add('draw_grid', time.perf_counter() - start)
+        pygame.display.update(updated)
+        self.dirty_cells.clear()
+        self.dirty_regions.clear()
+    
+    def frame(self, events=None):
+        self.profiler.start_frame()
+        self.handle_events(events)
+        self.update_animations()
+        if self.show_profiler:
+            self.dirty_regions.add('profiler')
+        self.draw()
+        self.profiler.end_frame()
     
     def run(self):
+        # While idle, block in pygame.event.wait so the process uses no CPU
+        # between key presses; only run at ANIMATION_FPS during animations.
+        # The profiler overlay, when shown, is refreshed on a timeout.
+        self.draw()
         while self.running:
-            self.handle_events()
-            self.draw()
-            self.clock.tick(60)
+            if self.animating():
+                self.clock.tick(ANIMATION_FPS)
+                events = pygame.event.get()
+            else:
+                timeout = PROFILER_REFRESH if self.show_profiler else 0
+                events = [pygame.event.wait(timeout)] + pygame.event.get()
+            self.frame(events)
         
         pygame.quit()
         sys.exit()
+    
+    def scripted_events(self, rng):
+        # One frame's worth of input for the benchmark: mostly cursor moves
+        # and digits (some of them invalid, which start a flash), with the
+        # odd clear, hint, cell click and difficulty button press
+        roll = rng.random()
+        if roll < 0.45:
+            key = rng.choice((pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT))
+        elif roll < 0.75:
+            key = pygame.K_1 + rng.randrange(9)
+        elif roll < 0.85:
+            key = pygame.K_DELETE
+        elif roll < 0.88:
+            key = pygame.K_h
+        elif roll < 0.96:
+            pos = (GRID_OFFSET_X + rng.randrange(GRID_SIZE), GRID_OFFSET_Y + rng.randrange(GRID_SIZE))
+            return [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)]
+        else:
+            pos = self.buttons[rng.choice(('easy', 'medium', 'hard', 'expert'))].center
+            return [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)]
+        return [pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode='')]
+    
+    def benchmark(self, frames, seed=0):
+        # Renders `frames` frames of scripted input as fast as possible and
+        # returns the profiler statistics; puzzle generation is not timed
+        rng = random.Random(seed)
+        self.game.rng = random.Random(seed)
+        self.new_game()
+        self.profiler = FrameProfiler(window=frames)
+        self.full_redraw = True
+        self.frame([])
+        start = time.perf_counter()
+        # SudokuGame reports moves on stdout; keep that out of the results
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(frames - 1):
+                pygame.event.pump()
+                self.frame(self.scripted_events(rng))
+        stats = self.profiler.stats()
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+
+def print_benchmark(stats, out=None):
+    print(f"{stats['frames']} frames in {stats['seconds']:.2f}s ({stats['fps']:.1f} FPS)", file=out)
+    print(f"  frame time  p50 {stats['p50_ms']:.3f} ms  p95 {stats['p95_ms']:.3f} ms  "
+          f"p99 {stats['p99_ms']:.3f} ms  max {stats['max_ms']:.3f} ms", file=out)
+    for name, ms in stats['sections_ms'].items():
+        print(f"  {name:14} {ms:.3f} ms/frame", file=out)
+
 
-def main():
-    game = SudokuPygame()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sudoku game (Pygame)")
+    parser.add_argument("--benchmark", type=int, metavar="N",
+                        help="render N frames of scripted input headlessly and print frame times")
+    parser.add_argument("--seed", type=int, default=0, help="benchmark: input and puzzle seed")
+    parser.add_argument("--no-dirty-rects", action="store_true",
+                        help="redraw the whole window every frame")
+    args = parser.parse_args(argv)
+    
+    if args.benchmark is not None:
+        if args.benchmark < 2:
+            parser.error("--benchmark needs at least 2 frames")
+        # Reopen the display on SDL's dummy driver so no window is needed
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        pygame.display.quit()
+        pygame.display.init()
+        game = SudokuPygame(dirty_rects=not args.no_dirty_rects)
+        print_benchmark(game.benchmark(args.benchmark, args.seed))
+        pygame.quit()
+        return 0
+    
+    game = SudokuPygame(dirty_rects=not args.no_dirty_rects)
     game.run()
 
 if __name__ == "__main__":
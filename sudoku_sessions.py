@@ -0,0 +1,76 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class GameSession:
+    # One player's game. Take `lock` around anything that reads or changes
+    # the game, since requests for the same session can arrive concurrently.
+    __slots__ = ("session_id", "game", "original", "lock", "last_access")
+
+    def __init__(self, session_id, game, now):
+        self.session_id = session_id
+        self.game = game
+        self.original = game.grid.copy()
+        self.lock = threading.Lock()
+        self.last_access = now
+
+
+class SessionStore:
+    # Sessions are kept in least-recently-used order. Idle sessions expire
+    # after `ttl` seconds and the oldest are evicted once `max_sessions` is
+    # reached, which bounds memory at roughly max_sessions small games.
+
+    def __init__(self, max_sessions=10000, ttl=3600, clock=time.monotonic):
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.clock = clock
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    def create(self, game):
+        now = self.clock()
+        session = GameSession(secrets.token_urlsafe(16), game, now)
+        with self.lock:
+            self.purge_expired(now)
+            while len(self.sessions) >= self.max_sessions:
+                self.sessions.popitem(last=False)
+                self.evicted += 1
+            self.sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id):
+        now = self.clock()
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            if now - session.last_access > self.ttl:
+                del self.sessions[session_id]
+                self.expired += 1
+                return None
+            session.last_access = now
+            self.sessions.move_to_end(session_id)
+            return session
+
+    def remove(self, session_id):
+        with self.lock:
+            return self.sessions.pop(session_id, None) is not None
+
+    def purge_expired(self, now):
+        # Caller holds self.lock. The oldest entries come first, so this
+        # stops at the first session that is still live.
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if now - session.last_access <= self.ttl:
+                break
+            self.sessions.popitem(last=False)
+            self.expired += 1
+
+    def __len__(self):
+        return len(self.sessions)
@@ -0,0 +1,475 @@
+import time
+from sudoku_board import Board
+
+ALL_DIGITS = 0x1FF
+
+# Unit indices: rows are 0-8, columns 9-17 and boxes 18-26
+CELL_UNITS = [(i // 9, 9 + i % 9, 18 + (i // 27) * 3 + (i % 9) // 3) for i in range(81)]
+
+UNITS = (
+    [[r * 9 + c for c in range(9)] for r in range(9)] +
+    [[r * 9 + c for r in range(9)] for c in range(9)] +
+    [[(b // 3) * 27 + (b % 3) * 3 + (k // 3) * 9 + k % 3 for k in range(9)] for b in range(9)]
+)
+
+PEERS = [
+    sorted({j for u in CELL_UNITS[i] for j in UNITS[u]} - {i})
+    for i in range(81)
+]
+
+# Per cell: (unit, unit * 9) for its three units, where unit * 9 + d - 1
+# indexes the per-unit digit counts; and each peer with those of its units
+# the cell is not in
+UNIT_BASES = [tuple((u, u * 9) for u in CELL_UNITS[i]) for i in range(81)]
+PEER_UNITS = [
+    tuple((p, tuple((u, base) for u, base in UNIT_BASES[p] if u not in CELL_UNITS[i]))
+          for p in PEERS[i])
+    for i in range(81)
+]
+
+BIT_COUNT = [bin(mask).count("1") for mask in range(512)]
+BIT_DIGIT = {1 << (d - 1): d for d in range(1, 10)}
+BIT_INDEX = {1 << (d - 1): d - 1 for d in range(1, 10)}
+BIT_SPLIT = [[1 << (d - 1) for d in range(1, 10) if mask & (1 << (d - 1))] for mask in range(512)]
+MASK_DIGITS = [[d for d in range(1, 10) if mask & (1 << (d - 1))] for mask in range(512)]
+
+
+class SolverStats:
+    # Counters are summed across every call that shares the record, except
+    # max_depth which keeps the deepest. Passing no record (the default)
+    # skips collection entirely apart from one None check per search node.
+    __slots__ = ("nodes", "backtracks", "max_depth", "candidates_tested", "wall_time")
+
+    def __init__(self):
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.candidates_tested = 0
+        self.wall_time = 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"SolverStats({fields})"
+
+
+def load_cells(grid):
+    if isinstance(grid, Board):
+        values = grid.cells
+    else:
+        values = [d for row in grid for d in row]
+    cells = [0] * 81
+    used = [0] * 27
+    for i in range(81):
+        d = values[i]
+        if d and not place(cells, used, i, d):
+            return None
+    return cells, used
+
+
+def place(cells, used, i, d):
+    bit = 1 << (d - 1)
+    r, c, b = CELL_UNITS[i]
+    if (used[r] | used[c] | used[b]) & bit:
+        return False
+    cells[i] = d
+    used[r] |= bit
+    used[c] |= bit
+    used[b] |= bit
+    return True
+
+
+def load_state(grid, exclude=None):
+    # Search state: (cells, candidate mask per cell, candidate count per
+    # unit and digit at u * 9 + d - 1, mask of digits placed per unit).
+    # Masks and counts are built from the givens in one pass, then the
+    # singles they leave are placed through assign(), so the state comes
+    # back fully propagated; None if the givens conflict or leave no
+    # solution. exclude: optional (cell index, digit) kept out of that
+    # empty cell's candidates.
+    loaded = load_cells(grid)
+    if loaded is None:
+        return None
+    cells, placed = loaded
+    cand = [0] * 81
+    count = [0] * 243
+    excluded_cell, excluded_bit = (exclude[0], 1 << (exclude[1] - 1)) if exclude else (-1, 0)
+    for i in range(81):
+        if not cells[i]:
+            r, c, b = CELL_UNITS[i]
+            mask = ALL_DIGITS & ~(placed[r] | placed[c] | placed[b])
+            if i == excluded_cell:
+                mask &= ~excluded_bit
+            if not mask:
+                return None
+            cand[i] = mask
+            for bit in BIT_SPLIT[mask]:
+                offset = BIT_INDEX[bit]
+                count[r * 9 + offset] += 1
+                count[c * 9 + offset] += 1
+                count[b * 9 + offset] += 1
+    state = (cells, cand, count, placed)
+
+    for i in range(81):
+        mask = cand[i]
+        if mask and not mask & (mask - 1) and not assign(state, i, mask):
+            return None
+    for u in range(27):
+        for bit in BIT_SPLIT[ALL_DIGITS & ~placed[u]]:
+            if placed[u] & bit or count[u * 9 + BIT_INDEX[bit]] > 1:
+                continue
+            for i in UNITS[u]:
+                if cand[i] & bit:
+                    break
+            else:
+                return None
+            if not assign(state, i, bit):
+                return None
+    return state
+
+
+def assign(state, i, bit, BIT_DIGIT=BIT_DIGIT, BIT_INDEX=BIT_INDEX, UNITS=UNITS,
+           CELL_UNITS=CELL_UNITS, PEER_UNITS=PEER_UNITS):
+    # Places digit `bit` at cell i and everything it forces: a cell left
+    # with one candidate (naked single) or a unit with one place left for a
+    # digit (hidden single). Candidate masks and unit counts are updated as
+    # digits go, so nothing is rescanned. False on contradiction, leaving
+    # the state unusable. (Tables are bound as defaults for local lookups.)
+    cells, cand, count, placed = state
+    naked = [(i, bit)]
+    hidden = []
+    while naked or hidden:
+        if naked:
+            i, bit = naked.pop()
+        else:
+            u, bit = hidden.pop()
+            if placed[u] & bit:
+                continue
+            for i in UNITS[u]:
+                if cand[i] & bit:
+                    break
+            else:
+                return False
+        if cells[i]:
+            if cells[i] != BIT_DIGIT[bit]:
+                return False
+            continue
+        rest = cand[i]
+        if not rest & bit:
+            return False
+
+        cells[i] = BIT_DIGIT[bit]
+        cand[i] = 0
+        r, c, b = CELL_UNITS[i]
+        placed[r] |= bit
+        placed[c] |= bit
+        placed[b] |= bit
+
+        # The other candidates of i lose a place in each of i's units,
+        # none of which can hold them yet
+        rest ^= bit
+        r9, c9, b9 = r * 9, c * 9, b * 9
+        while rest:
+            other = rest & -rest
+            rest ^= other
+            offset = BIT_INDEX[other]
+            left = count[r9 + offset] - 1
+            count[r9 + offset] = left
+            if left < 2:
+                if not left:
+                    return False
+                hidden.append((r, other))
+            left = count[c9 + offset] - 1
+            count[c9 + offset] = left
+            if left < 2:
+                if not left:
+                    return False
+                hidden.append((c, other))
+            left = count[b9 + offset] - 1
+            count[b9 + offset] = left
+            if left < 2:
+                if not left:
+                    return False
+                hidden.append((b, other))
+
+        # Peers lose the digit; their units other than i's lose a place for
+        # it (a peer still holding the candidate has it in none of them)
+        offset = BIT_INDEX[bit]
+        for p, unit_bases in PEER_UNITS[i]:
+            mask = cand[p]
+            if mask & bit:
+                mask ^= bit
+                cand[p] = mask
+                if not mask:
+                    return False
+                if not mask & (mask - 1):
+                    naked.append((p, mask))
+                for u, base in unit_bases:
+                    k = base + offset
+                    left = count[k] - 1
+                    count[k] = left
+                    if left < 2:
+                        if not left:
+                            return False
+                        hidden.append((u, bit))
+    return True
+
+
+def search(state, solutions, limit, stats=None, depth=0, choice=None):
+    # choice: (cell, bit) to place on state before looking further
+    if stats is not None:
+        stats.nodes += 1
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+
+    if choice is not None and not assign(state, *choice):
+        return
+
+    # Branch on the empty cell with the fewest candidates (MRV); filled
+    # cells have no candidates left
+    cells, cand, counts, placed = state
+    best = -1
+    best_count = 10
+    for i in range(81):
+        mask = cand[i]
+        if mask:
+            count = BIT_COUNT[mask]
+            if count < best_count:
+                best, best_count = i, count
+                if count == 2:
+                    break
+
+    if best < 0:
+        solutions.append(cells)
+        return
+
+    choices = [(best, bit) for bit in BIT_SPLIT[cand[best]]]
+    if best_count > 2:
+        # A digit with fewer places left in some unit is a narrower branch
+        for u in range(27):
+            missing = ALL_DIGITS & ~placed[u]
+            base = u * 9
+            for bit in BIT_SPLIT[missing]:
+                if counts[base + BIT_INDEX[bit]] < best_count:
+                    best_count = counts[base + BIT_INDEX[bit]]
+                    choices = [(i, bit) for i in UNITS[u] if cand[i] & bit]
+                    if best_count == 2:
+                        break
+            if best_count == 2:
+                break
+
+    for choice in choices:
+        if stats is not None:
+            stats.candidates_tested += 1
+            found = len(solutions)
+        child = (cells[:], cand[:], counts[:], placed[:])
+        search(child, solutions, limit, stats, depth + 1, choice)
+        if len(solutions) >= limit:
+            return
+        if stats is not None and len(solutions) == found:
+            stats.backtracks += 1
+
+
+def write_cells(grid, cells):
+    if isinstance(grid, Board):
+        grid.cells[:] = bytes(cells)
+        return
+    for r in range(9):
+        row = grid[r]
+        for c in range(9):
+            row[c] = cells[r * 9 + c]
+
+
+def bitmask_solutions(grid, limit, stats=None, exclude=None):
+    state = load_state(grid, exclude)
+    if state is None:
+        return []
+
+    solutions = []
+    search(state, solutions, limit, stats)
+    return solutions
+
+class DancingLinks:
+    # Exact cover with node arrays instead of node objects; node 0 is the root
+    # and nodes 1..n_columns are the column headers
+
+    def __init__(self, n_columns):
+        count = n_columns + 1
+        self.left = [i - 1 for i in range(count)]
+        self.right = [i + 1 for i in range(count)]
+        self.left[0] = n_columns
+        self.right[n_columns] = 0
+        self.up = list(range(count))
+        self.down = list(range(count))
+        self.column = list(range(count))
+        self.row_id = [-1] * count
+        self.size = [0] * count
+
+    def add_row(self, row_id, columns):
+        first = len(self.left)
+        for offset, col in enumerate(columns):
+            node = first + offset
+            self.column.append(col)
+            self.row_id.append(row_id)
+            self.up.append(self.up[col])
+            self.down.append(col)
+            self.down[self.up[col]] = node
+            self.up[col] = node
+            self.size[col] += 1
+            self.left.append(node - 1 if offset else first + len(columns) - 1)
+            self.right.append(node + 1 if offset < len(columns) - 1 else first)
+
+    def cover(self, col):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                self.size[self.column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, col):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                self.size[self.column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    def search(self, partial, solutions, limit, stats=None):
+        right, down, size = self.right, self.down, self.size
+        if stats is not None:
+            stats.nodes += 1
+            if len(partial) > stats.max_depth:
+                stats.max_depth = len(partial)
+        if right[0] == 0:
+            solutions.append(list(partial))
+            return
+
+        # Knuth's S heuristic: branch on the column with the fewest rows
+        col = right[0]
+        best = col
+        while col != 0:
+            if size[col] < size[best]:
+                best = col
+                if size[col] < 2:
+                    break
+            col = right[col]
+        if size[best] == 0:
+            return
+
+        self.cover(best)
+        node = down[best]
+        while node != best:
+            if stats is not None:
+                stats.candidates_tested += 1
+                found = len(solutions)
+            partial.append(self.row_id[node])
+            j = right[node]
+            while j != node:
+                self.cover(self.column[j])
+                j = right[j]
+            self.search(partial, solutions, limit, stats)
+            j = self.left[node]
+            while j != node:
+                self.uncover(self.column[j])
+                j = self.left[j]
+            partial.pop()
+            if len(solutions) >= limit:
+                break
+            if stats is not None and len(solutions) == found:
+                stats.backtracks += 1
+            node = down[node]
+        self.uncover(best)
+
+
+def build_exact_cover(grid, exclude=None):
+    # 324 constraint columns: cell filled, row/digit, column/digit, box/digit.
+    # Only rows compatible with the givens are added, so conflicting givens
+    # simply leave the matrix without an exact cover. exclude is as for
+    # load_state().
+    state = load_cells(grid)
+    if state is None:
+        return None
+    cells, used = state
+
+    links = DancingLinks(324)
+    for i in range(81):
+        r, c, b = CELL_UNITS[i]
+        if cells[i]:
+            digits = [cells[i]]
+        else:
+            mask = ALL_DIGITS & ~(used[r] | used[c] | used[b])
+            if exclude and exclude[0] == i:
+                mask &= ~(1 << (exclude[1] - 1))
+            digits = MASK_DIGITS[mask]
+        for d in digits:
+            links.add_row(i * 9 + d - 1, (
+                1 + i,
+                82 + r * 9 + d - 1,
+                163 + (c - 9) * 9 + d - 1,
+                244 + (b - 18) * 9 + d - 1,
+            ))
+    return links
+
+
+def dlx_solutions(grid, limit, stats=None, exclude=None):
+    links = build_exact_cover(grid, exclude)
+    if links is None:
+        return []
+
+    solutions = []
+    links.search([], solutions, limit, stats)
+
+    result = []
+    for rows in solutions:
+        cells = [0] * 81
+        for row_id in rows:
+            cells[row_id // 9] = row_id % 9 + 1
+        result.append(cells)
+    return result
+
+
+SOLVERS = {
+    "bitmask": bitmask_solutions,
+    "dlx": dlx_solutions,
+}
+
+
+def find_solutions(grid, limit, solver="bitmask", stats=None, exclude=None):
+    # exclude: optional (cell index, digit) that an empty cell may not take
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {solver}")
+    if stats is None:
+        return SOLVERS[solver](grid, limit, exclude=exclude)
+
+    start = time.perf_counter()
+    solutions = SOLVERS[solver](grid, limit, stats, exclude)
+    stats.wall_time += time.perf_counter() - start
+    return solutions
+
+
+def solve_sudoku(grid, solver="bitmask", stats=None):
+    solutions = find_solutions(grid, 1, solver, stats)
+    if not solutions:
+        return False
+    write_cells(grid, solutions[0])
+    return True
+
+
+def count_solutions(grid, limit=2, solver="bitmask", stats=None, exclude=None):
+    # Stops searching as soon as `limit` solutions are found
+    return len(find_solutions(grid, limit, solver, stats, exclude))
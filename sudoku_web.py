@@ -1,33 +1,32 @@
+import argparse
+import base64
+import gzip
+import hashlib
 import http.server
-import socketserver
 import json
+import math
+import multiprocessing
+import os
+import selectors
+import socket
+import stat
+import sys
 import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import sudoku_batch
+import sudoku_solver
+from sudoku_admission import RateLimiter, WorkQueue, retry_after
 from sudoku_game import SudokuGame
+from sudoku_metrics import AccessLog, Registry
+from sudoku_pool import DIFFICULTIES, PuzzlePool
+from sudoku_sessions import SessionStore
+from sudoku_solver import SolverStats
 import threading
 import webbrowser
 import time
 
-class SudokuWebServer(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        self.game = SudokuGame()
-        super().__init__(*args, **kwargs)
-    
-    def do_GET(self):
-        if self.path == '/' or self.path == '/index.html':
-            self.serve_index()
-        elif self.path.startswith('/api/'):
-            self.handle_api_get()
-        else:
-            super().do_GET()
-    
-    def do_POST(self):
-        if self.path.startswith('/api/'):
-            self.handle_api_post()
-        else:
-            self.send_error(404)
-    
-    def serve_index(self):
-        html_content = """<!DOCTYPE html>
+INDEX_HTML = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -121,6 +120,13 @@ class SudokuWebServer(http.server.SimpleHTTPRequestHandler):
             box-shadow: 0 4px 8px rgba(0,0,0,0.2);
         }
 
+        button:disabled {
+            opacity: 0.5;
+            cursor: not-allowed;
+            transform: none;
+            box-shadow: none;
+        }
+
         .sudoku-grid {
             display: grid;
             grid-template-columns: repeat(9, 1fr);
@@ -260,7 +266,7 @@ class SudokuWebServer(http.server.SimpleHTTPRequestHandler):
             </div>
             
             <div class="buttons">
-                <button class="btn-primary" onclick="newGame()">New Game</button>
+                <button class="btn-primary" id="newGameButton" onclick="newGame()">New Game</button>
                 <button class="btn-warning" onclick="clearCell()">Clear Cell</button>
                 <button class="btn-info" onclick="getHint()">Hint</button>
                 <button class="btn-purple" onclick="showSolution()">Solution</button>
@@ -322,17 +328,62 @@ class SudokuWebServer(http.server.SimpleHTTPRequestHandler):
             document.getElementById('status').textContent = message;
         }
 
+        function decodeGrid(value, format) {
+            // Compact formats hold 81 cells row by row: a digit string, or
+            // base64 with two cells per byte, high nibble first
+            let cells;
+            if (format === 'packed') {
+                const bytes = atob(value);
+                cells = [];
+                for (let i = 0; i < 81; i++) {
+                    const byte = bytes.charCodeAt(i >> 1);
+                    cells.push(i % 2 === 0 ? byte >> 4 : byte & 15);
+                }
+            } else if (format === 'string') {
+                cells = Array.from(value, Number);
+            } else {
+                return value;
+            }
+            
+            const rows = [];
+            for (let i = 0; i < 81; i += 9) {
+                rows.push(cells.slice(i, i + 9));
+            }
+            return rows;
+        }
+
         async function newGame() {
             const difficulty = document.getElementById('difficulty').value;
             
             try {
-                const response = await fetch('/api/new_game', {
+                const response = await fetch('/api/new_game?format=packed', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({ difficulty: difficulty })
                 });
                 
-                gameData = await response.json();
+                const result = await response.json();
+                if (!response.ok) {
+                    // 429 (rate limited) and 503 (busy) say when to retry;
+                    // keep the button off until then
+                    const wait = parseInt(response.headers.get('Retry-After'), 10);
+                    let message = result.error || 'Could not start a new game.';
+                    if (wait > 0) {
+                        const button = document.getElementById('newGameButton');
+                        button.disabled = true;
+                        setTimeout(() => { button.disabled = false; }, wait * 1000);
+                        message += ` Try again in ${wait} second${wait === 1 ? '' : 's'}.`;
+                    }
+                    updateStatus(message);
+                    return;
+                }
+                const grid = decodeGrid(result.grid, result.format);
+                gameData = {
+                    gameId: result.gameId,
+                    grid: grid,
+                    solution: decodeGrid(result.solution, result.format),
+                    originalGrid: result.originalGrid || grid.map(row => row.slice())
+                };
                 updateDisplay();
                 
                 const emptyCount = gameData.grid.flat().filter(x => x === 0).length;
@@ -377,12 +428,14 @@ class SudokuWebServer(http.server.SimpleHTTPRequestHandler):
                 const response = await fetch('/api/make_move', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ row: row, col: col, num: num })
+                    body: JSON.stringify({ gameId: gameData.gameId, row: row, col: col, num: num })
                 });
                 
                 const result = await response.json();
                 
-                if (result.success) {
+                if (result.error) {
+                    updateStatus(`${result.error} Click 'New Game' to start again.`);
+                } else if (result.success) {
                     gameData.grid[row][col] = num;
                     updateDisplay();
                     updateStatus(`Placed ${num} in cell (${row + 1}, ${col + 1})`);
@@ -414,9 +467,26 @@ class SudokuWebServer(http.server.SimpleHTTPRequestHandler):
                 return;
             }
             
-            gameData.grid[row][col] = 0;
-            updateDisplay();
-            updateStatus(`Cleared cell (${row + 1}, ${col + 1})`);
+            try {
+                const response = await fetch('/api/clear_cell', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ gameId: gameData.gameId, row: row, col: col })
+                });
+                
+                const result = await response.json();
+                
+                if (result.error) {
+                    updateStatus(`${result.error} Click 'New Game' to start again.`);
+                    return;
+                }
+                
+                gameData.grid[row][col] = 0;
+                updateDisplay();
+                updateStatus(`Cleared cell (${row + 1}, ${col + 1})`);
+            } catch (error) {
+                updateStatus('Error clearing cell!');
+            }
         }
 
         async function getHint() {
@@ -449,34 +519,687 @@ class SudokuWebServer(http.server.SimpleHTTPRequestHandler):
     </script>
 </body>
 </html>"""
+
+# Largest JSON request body the API will read
+MAX_BODY_SIZE = 64 * 1024
+
+# Limits for /api/solve_batch and /api/validate_batch. Results are flushed
+# to the client every BATCH_CHUNK_SIZE puzzles.
+MAX_BATCH_BODY_SIZE = 8 * 1024 * 1024
+MAX_BATCH_SIZE = 10000
+BATCH_CHUNK_SIZE = 16
+
+# Static files of these types are gzipped when the client accepts it
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+def accepts_gzip(accept_encoding):
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() in ("gzip", "x-gzip", "*"):
+            params = params.strip().lower()
+            if params.startswith("q="):
+                try:
+                    return float(params[2:]) > 0
+                except ValueError:
+                    return False
+            return True
+    return False
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+class CachedFile:
+    # A response body encoded once, plus a gzip variant when that is smaller.
+    # Each variant has its own strong ETag, since the bytes differ.
+    __slots__ = ("content_type", "body", "etag", "gzip_body", "gzip_etag", "last_modified")
+    
+    def __init__(self, body, content_type, compress=True, last_modified=None):
+        self.content_type = content_type
+        self.body = body
+        self.etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        self.gzip_body = None
+        self.gzip_etag = None
+        self.last_modified = last_modified
+        if compress:
+            # mtime=0 keeps the compressed bytes, and so the ETag, stable
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.gzip_body = compressed
+                self.gzip_etag = self.etag[:-1] + '-gzip"'
+    
+    def variant(self, accept_encoding):
+        # Returns (body, etag, content encoding or None)
+        if self.gzip_body is not None and accepts_gzip(accept_encoding):
+            return self.gzip_body, self.gzip_etag, "gzip"
+        return self.body, self.etag, None
+
+class StaticCache:
+    # Static files by path, revalidated against their mtime and size on each
+    # request so edits show up without a restart. Large files are not cached.
+    
+    def __init__(self, max_entries=256, max_file_size=1 << 20):
+        self.max_entries = max_entries
+        self.max_file_size = max_file_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, path, content_type):
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(info.st_mode) or info.st_size > self.max_file_size:
+            return None
+        
+        version = (info.st_mtime_ns, info.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(path)
+                return entry[1]
+        
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except OSError:
+            return None
+        cached = CachedFile(body, content_type, compress=content_type.startswith(COMPRESSIBLE_TYPES),
+                            last_modified=info.st_mtime)
+        with self.lock:
+            self.entries[path] = (version, cached)
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return cached
+
+INDEX_PAGE = CachedFile(INDEX_HTML.encode(), "text/html; charset=utf-8")
+
+# Grid encodings for /api/new_game: nested 9x9 arrays (the default), an
+# 81-digit string, or base64 of Board.pack()
+WIRE_FORMATS = ("rows", "string", "packed")
+
+def encode_board(board, wire_format):
+    if wire_format == "string":
+        return board.to_string()
+    if wire_format == "packed":
+        return base64.b64encode(board.pack()).decode()
+    return board.to_rows()
+
+# Request metrics are labelled with these paths; anything else is "other" so
+# that arbitrary URLs cannot create new series
+METRIC_PATHS = {'/', '/metrics', '/api/new_game', '/api/make_move', '/api/clear_cell',
+                '/api/pool_stats', '/api/solve_batch', '/api/validate_batch'}
+NODE_BUCKETS = (100, 300, 1000, 3000, 10000, 30000, 100000, 300000, 1000000)
+
+class ServerMetrics:
+    def __init__(self, server):
+        sessions = server.sessions
+        generation_queue = server.generation_queue
+        registry = self.registry = Registry()
+        self.requests = registry.counter(
+            "sudoku_http_requests_total", "HTTP requests by path, method and status.",
+            ("path", "method", "status"))
+        self.latency = registry.histogram(
+            "sudoku_http_request_duration_seconds", "Time to handle a request, by path.", ("path",))
+        self.in_flight = registry.gauge(
+            "sudoku_http_requests_in_flight", "Requests currently being handled.")
+        registry.gauge("sudoku_http_connections_idle",
+                       "Open connections waiting for their next request.",
+                       function=lambda: len(server.idle))
+        registry.gauge("sudoku_http_connections_queued",
+                       "Readable connections waiting for a worker thread.",
+                       function=lambda: server.queued)
+        self.create_puzzle = registry.histogram(
+            "sudoku_create_puzzle_duration_seconds",
+            "Time to generate a puzzle, inline or for the pool, by difficulty.", ("difficulty",))
+        self.solver_nodes = registry.histogram(
+            "sudoku_create_puzzle_solver_nodes",
+            "Solver search nodes spent generating a puzzle, by difficulty.", ("difficulty",),
+            buckets=NODE_BUCKETS)
+        registry.gauge("sudoku_sessions_active", "Games held in the session store.",
+                       function=lambda: len(sessions))
+        registry.gauge("sudoku_generation_queue_depth",
+                       "Requests waiting for an inline puzzle generation slot.",
+                       function=lambda: generation_queue.waiting)
+        registry.gauge("sudoku_generation_active", "Inline puzzle generations running.",
+                       function=lambda: generation_queue.active)
+        self.rejections = registry.counter(
+            "sudoku_admission_rejections_total",
+            "Requests turned away by admission control, by reason.", ("reason",))
+    
+    def record_request(self, path, method, status, seconds):
+        path = urllib.parse.urlsplit(path).path
+        if path == '/index.html':
+            path = '/'
+        elif path not in METRIC_PATHS:
+            path = 'other'
+        self.in_flight.dec()
+        self.requests.inc(path, method or '', str(status or ''))
+        self.latency.observe(seconds, path)
+    
+    def record_generation(self, difficulty, seconds, stats):
+        self.create_puzzle.observe(seconds, difficulty)
+        self.solver_nodes.observe(stats.nodes, difficulty)
+
+def puzzle_text(item):
+    # Batch items are 81-character strings or 9x9 digit arrays. Anything
+    # else becomes "?", which the batch helpers report as invalid, so every
+    # item keeps its index.
+    if isinstance(item, str):
+        return item.strip() or "?"
+    if (isinstance(item, list) and len(item) == 9
+            and all(isinstance(row, list) and len(row) == 9 for row in item)
+            and all(isinstance(n, int) and 0 <= n <= 9 for row in item for n in row)):
+        return "".join(str(n) for row in item for n in row)
+    return "?"
+
+def parse_batch(text):
+    # A JSON array of puzzles, or one puzzle per line (NDJSON). NDJSON lines
+    # may hold a JSON string or array, or bare puzzle text. Raises ValueError.
+    if text.lstrip().startswith('['):
+        try:
+            items = json.loads(text)
+        except ValueError:
+            items = None
+        if items is not None:
+            return [puzzle_text(item) for item in items]
+    
+    puzzles = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        puzzles.append(puzzle_text(json.loads(line) if line[0] in '"[' else line))
+    return puzzles
+
+BUSY_BODY = json.dumps({'error': 'The server is busy, try again shortly.'}).encode()
+BUSY_RESPONSE = (b"HTTP/1.1 503 Service Unavailable\r\n"
+                 b"Content-Type: application/json\r\n"
+                 b"Content-Length: " + str(len(BUSY_BODY)).encode() + b"\r\n"
+                 b"Retry-After: 1\r\nConnection: close\r\n\r\n" + BUSY_BODY)
+
+class SudokuHTTPServer(http.server.HTTPServer):
+    # Connections are handled on a fixed-size thread pool, so a slow
+    # generation only ties up one worker instead of the whole server, and a
+    # burst of clients cannot spawn unbounded threads. A worker is only busy
+    # while a request is being handled: new and kept-alive connections wait
+    # on a selector in the idle thread until they become readable, and are
+    # closed after `idle_timeout` seconds without a request. At most
+    # `max_queued_connections` readable connections wait for a worker; any
+    # more get an immediate 503. Every connection is closed after
+    # `max_keepalive_requests` responses.
+    allow_reuse_address = True
+    request_queue_size = 128
+    
+    def __init__(self, server_address, handler_class, workers=32, sessions=None, pool=None,
+                 keep_alive=True, idle_timeout=15, max_keepalive_requests=100,
+                 batch_workers=None, access_log=None, rate_limit=2.0, rate_burst=10,
+                 max_generations=2, max_generation_queue=16, generation_wait=2.0,
+                 generation_budget=2.0, max_queued_connections=None, trust_forwarded_for=False):
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self.max_queued_connections = (4 * workers if max_queued_connections is None
+                                       else max_queued_connections)
+        self.queued = 0
+        self.queued_lock = threading.Lock()
+        # Admission control for expensive work. Each client may start
+        # rate_limit new games or batches per second (bursts of rate_burst;
+        # 0 turns the limit off). Inline generation on a pool miss runs at
+        # most max_generations at once, waits at most generation_wait
+        # seconds for a slot behind max_generation_queue others, and is
+        # abandoned after generation_budget seconds. Clients are told apart
+        # by IP address, so everyone behind one NAT shares a limit; behind a
+        # reverse proxy, trust_forwarded_for keys on the X-Forwarded-For
+        # address the proxy adds instead of the proxy's own.
+        self.rate_limiter = RateLimiter(rate_limit, rate_burst) if rate_limit > 0 else None
+        self.trust_forwarded_for = trust_forwarded_for
+        self.generation_queue = WorkQueue(max_generations, max_generation_queue)
+        self.generation_wait = generation_wait
+        self.generation_budget = generation_budget
+        self.access_log = access_log
+        self.batch_workers = batch_workers or os.cpu_count() or 1
+        self.batch_pool = None
+        self.batch_lock = threading.Lock()
+        self.keep_alive = keep_alive
+        self.idle_timeout = idle_timeout
+        self.max_keepalive_requests = max_keepalive_requests
+        self.sessions = sessions if sessions is not None else SessionStore()
+        self.pool = pool
+        self.static_cache = StaticCache()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sudoku-http")
+        
+        # Idle connections: socket -> (deadline, client address, handler or
+        # None before the first request). Only the idle thread touches the
+        # selector; other threads hand it connections through `parking` and
+        # wake it with a byte on the socket pair.
+        self.idle = {}
+        self.parking = []
+        self.parking_lock = threading.Lock()
+        self.idle_closed = False
+        self.selector = selectors.DefaultSelector()
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.wakeup_recv.setblocking(False)
+        self.wakeup_send.setblocking(False)
+        self.selector.register(self.wakeup_recv, selectors.EVENT_READ)
+        self.idle_thread = threading.Thread(target=self.idle_loop, name="sudoku-idle", daemon=True)
+        
+        self.metrics = ServerMetrics(self)
+        if pool is not None:
+            pool.on_generate = self.metrics.record_generation
+        self.idle_thread.start()
+    
+    def process_request(self, request, client_address):
+        # A new connection waits on the selector like an idle one, so a
+        # client that connects and sends nothing does not take a worker
+        if not self.park(request, client_address):
+            self.shutdown_request(request)
+    
+    def finish_request(self, request, client_address):
+        # Returns the handler so a kept-alive connection can be resumed
+        return self.RequestHandlerClass(request, client_address, self)
+    
+    def dispatch(self, request, client_address, handler=None):
+        # Called by the idle thread for a readable connection
+        with self.queued_lock:
+            full = self.queued >= self.max_queued_connections
+            if not full:
+                self.queued += 1
+        if full:
+            self.metrics.rejections.inc('connection_queue_full')
+            self.reject(request, handler)
+            return
+        self.executor.submit(self.process_request_thread, request, client_address, handler)
+    
+    def reject(self, request, handler):
+        # Answers without reading the request, so the idle thread never blocks:
+        # whatever has arrived is discarded and a canned 503 sent
+        try:
+            request.setblocking(False)
+            request.recv(65536)
+            request.send(BUSY_RESPONSE)
+        except OSError:
+            pass
+        self.close_idle(request, handler)
+    
+    def process_request_thread(self, request, client_address, handler=None):
+        with self.queued_lock:
+            self.queued -= 1
+        keep_open = False
+        try:
+            if handler is None:
+                handler = self.finish_request(request, client_address)
+            else:
+                handler.resume()
+            keep_open = not handler.close_connection
+        except Exception:
+            self.handle_error(request, client_address)
+        if keep_open and self.park(request, client_address, handler):
+            return
+        self.close_idle(request, handler)
+    
+    def park(self, request, client_address, handler=None):
+        # Hands a connection to the idle thread. False once the server is closing.
+        with self.parking_lock:
+            if self.idle_closed:
+                return False
+            self.parking.append((request, client_address, handler))
+        try:
+            self.wakeup_send.send(b"\0")
+        except BlockingIOError:
+            pass  # the idle thread already has wake-ups pending
+        return True
+    
+    def close_idle(self, request, handler):
+        if handler is not None:
+            handler.close_connection = True
+            handler.finish()
+        self.shutdown_request(request)
+    
+    def idle_loop(self):
+        timeout = math.inf if self.idle_timeout is None else self.idle_timeout
+        while True:
+            with self.parking_lock:
+                parking, self.parking = self.parking, []
+                closed = self.idle_closed
+            if closed:
+                break
+            now = time.monotonic()
+            for request, client_address, handler in parking:
+                try:
+                    self.selector.register(request, selectors.EVENT_READ)
+                except (ValueError, OSError):
+                    self.close_idle(request, handler)
+                    continue
+                self.idle[request] = (now + timeout, client_address, handler)
+            
+            wait = None
+            if self.idle:
+                wait = min(deadline for deadline, _, _ in self.idle.values()) - now
+                wait = None if wait == math.inf else max(0.0, wait)
+            for key, _ in self.selector.select(wait):
+                request = key.fileobj
+                if request is self.wakeup_recv:
+                    try:
+                        while request.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                self.selector.unregister(request)
+                _, client_address, handler = self.idle.pop(request)
+                self.dispatch(request, client_address, handler)
+            
+            now = time.monotonic()
+            for request in [request for request, (deadline, _, _) in self.idle.items()
+                            if deadline <= now]:
+                self.selector.unregister(request)
+                _, _, handler = self.idle.pop(request)
+                self.close_idle(request, handler)
         
+        for request, (_, _, handler) in list(self.idle.items()):
+            self.close_idle(request, handler)
+        self.idle.clear()
+        for request, _, handler in parking:
+            self.close_idle(request, handler)
+        self.selector.close()
+    
+    def batch_executor(self):
+        # Worker processes for batch solving, shared by every request and
+        # started on first use. None means solve inline on the request thread.
+        # That first use is on a handler thread, so workers are spawned
+        # rather than forked from a process that is already running threads.
+        if self.batch_workers == 1:
+            return None
+        with self.batch_lock:
+            if self.batch_pool is None:
+                self.batch_pool = ProcessPoolExecutor(
+                    max_workers=self.batch_workers,
+                    mp_context=multiprocessing.get_context("spawn"))
+            return self.batch_pool
+    
+    def server_close(self):
+        super().server_close()
+        with self.parking_lock:
+            self.idle_closed = True
+        self.wakeup_send.send(b"\0")
+        self.idle_thread.join()
+        self.wakeup_send.close()
+        self.wakeup_recv.close()
+        self.executor.shutdown(wait=False)
+        if self.batch_pool is not None:
+            self.batch_pool.shutdown(wait=False)
+
+class SudokuWebServer(http.server.SimpleHTTPRequestHandler):
+    # Responses are small and written as headers then body, so Nagle's
+    # algorithm would otherwise delay every reply on a kept-alive connection
+    disable_nagle_algorithm = True
+    
+    def setup(self):
+        if self.server.keep_alive:
+            self.protocol_version = 'HTTP/1.1'
+        self.timeout = self.server.idle_timeout
+        self.responses_sent = 0
+        self.close_sent = False
+        super().setup()
+    
+    def handle(self):
+        # Serves requests while the next one can be read without waiting,
+        # e.g. when pipelined, then returns with close_connection False to
+        # have the server park the open connection until it is readable
+        try:
+            while True:
+                self.handle_one_request()
+                if self.close_connection or not self.request_waiting():
+                    return
+        except BaseException:
+            self.close_connection = True
+            raise
+    
+    def resume(self):
+        try:
+            self.handle()
+        finally:
+            self.finish()
+    
+    def finish(self):
+        # A parked connection keeps its files for the next request
+        if self.close_connection:
+            super().finish()
+    
+    def request_waiting(self):
+        # True if the next request (or EOF) is already readable, either in
+        # rfile's buffer or on the socket, checked without blocking
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+    
+    def parse_request(self):
+        # Called once the request line has arrived, so keep-alive idle time
+        # is not counted as latency
+        self.request_start = time.perf_counter()
+        self.server.metrics.in_flight.inc()
+        return super().parse_request()
+    
+    def handle_one_request(self):
+        self.request_start = None
+        self.status_code = None
+        try:
+            super().handle_one_request()
+        finally:
+            if self.request_start is not None:
+                self.server.metrics.record_request(
+                    getattr(self, 'path', ''), self.command, self.status_code,
+                    time.perf_counter() - self.request_start)
+    
+    def log_message(self, format, *args):
+        # Off unless the server has an access log, which writes in batches
+        access_log = self.server.access_log
+        if access_log is not None:
+            access_log.write("%s - - [%s] %s\n" % (self.address_string(),
+                                                   self.log_date_time_string(), format % args))
+    
+    def send_response(self, code, message=None):
+        self.close_sent = False
+        self.status_code = code
+        super().send_response(code, message)
+        self.responses_sent += 1
+        if self.protocol_version == 'HTTP/1.1' and (
+                self.close_connection or self.responses_sent >= self.server.max_keepalive_requests):
+            self.send_header('Connection', 'close')
+    
+    def send_header(self, keyword, value):
+        # send_error adds its own Connection: close; only send it once
+        if keyword.lower() == 'connection' and value.lower() == 'close':
+            if self.close_sent:
+                return
+            self.close_sent = True
+        super().send_header(keyword, value)
+    
+    def do_GET(self):
+        if self.path == '/' or self.path == '/index.html':
+            self.serve_index()
+        elif self.path.startswith('/api/'):
+            self.handle_api_get()
+        elif self.path == '/metrics':
+            self.serve_metrics()
+        else:
+            self.serve_static()
+    
+    def do_HEAD(self):
+        if self.path == '/' or self.path == '/index.html':
+            self.send_cached(INDEX_PAGE, head=True)
+        else:
+            self.serve_static(head=True)
+    
+    def do_POST(self):
+        if self.path.startswith('/api/'):
+            self.handle_api_post()
+        elif self.read_body() is not None:
+            self.send_error(404)
+    
+    def read_body(self, limit=MAX_BODY_SIZE):
+        # Returns the request body, or None after sending an error. The body
+        # must be consumed in full before the next request on a kept-alive
+        # connection can be parsed, so anything unreadable closes it.
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self.close_connection = True
+            self.send_json({'error': 'Content-Length is required.'}, 411)
+            return None
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self.send_json({'error': 'Invalid Content-Length.'}, 400)
+            return None
+        if length > limit:
+            self.close_connection = True
+            self.send_json({'error': 'Request body too large.'}, 413)
+            return None
+        return self.rfile.read(length)
+    
+    def serve_index(self):
+        self.send_cached(INDEX_PAGE)
+    
+    def serve_static(self, head=False):
+        path = self.translate_path(self.path)
+        cached = self.server.static_cache.get(path, self.guess_type(path))
+        if cached is None:
+            # Directories, missing paths and large files take the stock route
+            if head:
+                super().do_HEAD()
+            else:
+                super().do_GET()
+            return
+        self.send_cached(cached, head)
+    
+    def send_cached(self, cached, head=False):
+        body, etag, encoding = cached.variant(self.headers.get('Accept-Encoding'))
+        not_modified = etag_matches(self.headers.get('If-None-Match'), etag)
+        
+        self.send_response(304 if not_modified else 200)
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if cached.last_modified is not None:
+            self.send_header('Last-Modified', self.date_time_string(cached.last_modified))
+        if not not_modified:
+            self.send_header('Content-type', cached.content_type)
+            self.send_header('Content-Length', str(len(body)))
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        if not not_modified and not head:
+            self.wfile.write(body)
+    
+    def serve_metrics(self):
+        body = self.server.metrics.registry.render().encode()
         self.send_response(200)
-        self.send_header('Content-type', 'text/html')
+        self.send_header('Content-type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(html_content.encode())
+        self.wfile.write(body)
+    
+    def handle_api_get(self):
+        if self.path == '/api/pool_stats' and self.server.pool is not None:
+            self.send_json(self.server.pool.stats())
+        else:
+            self.send_error(404)
     
     def handle_api_post(self):
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
-        data = json.loads(post_data.decode())
+        if self.path.startswith(('/api/solve_batch', '/api/validate_batch')):
+            self.handle_batch()
+            return
+        
+        post_data = self.read_body()
+        if post_data is None:
+            return
+        try:
+            data = json.loads(post_data.decode())
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            self.send_json({'error': 'Request body must be a JSON object.'}, 400)
+            return
         
-        if self.path == '/api/new_game':
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == '/api/new_game':
+            wire_format = self.wire_format(url.query)
+            if wire_format is None:
+                self.send_json({'error': f'Format must be one of {", ".join(WIRE_FORMATS)}.'}, 400)
+                return
+            if not self.check_rate_limit():
+                return
             difficulty = data.get('difficulty', 'medium')
-            self.game.create_puzzle(difficulty)
+            if difficulty not in DIFFICULTIES:
+                difficulty = 'medium'
+            game = SudokuGame()
+            entry = self.server.pool.get(difficulty) if self.server.pool else None
+            if entry is not None:
+                game.load_grid(*entry)
+            elif not self.generate_puzzle(game, difficulty):
+                return
+            session = self.server.sessions.create(game)
             
             response_data = {
-                'grid': self.game.grid,
-                'solution': self.game.solution,
-                'originalGrid': [row[:] for row in self.game.grid]
+                'gameId': session.session_id,
+                'grid': encode_board(game.grid, wire_format),
+                'solution': encode_board(game.solution, wire_format)
             }
+            if wire_format == 'rows':
+                response_data['originalGrid'] = session.original.to_rows()
+            else:
+                # A new game's grid is its original grid, so compact
+                # formats leave the copy out
+                response_data['format'] = wire_format
         
-        elif self.path == '/api/make_move':
-            row = data['row']
-            col = data['col']
-            num = data['num']
+        elif url.path in ('/api/make_move', '/api/clear_cell'):
+            game_id = data.get('gameId')
+            session = self.server.sessions.get(game_id) if isinstance(game_id, str) else None
+            if session is None:
+                self.send_json({'error': 'Unknown or expired game.'}, 404)
+                return
             
-            success = self.game.make_move(row, col, num)
-            completed = self.game.is_complete() and self.game.is_valid_solution()
+            row = data.get('row')
+            col = data.get('col')
+            num = data.get('num', 0)
+            if not (isinstance(row, int) and isinstance(col, int) and isinstance(num, int)
+                    and 0 <= row < 9 and 0 <= col < 9 and 0 <= num <= 9):
+                self.send_json({'error': 'Row, column and number must be 0-8, 0-8 and 1-9.'}, 400)
+                return
+            
+            with session.lock:
+                game = session.game
+                if session.original[row, col] != 0:
+                    success = False
+                elif url.path == '/api/make_move':
+                    # A digit the player entered may be overwritten: clear
+                    # it first and put it back if the new one conflicts
+                    previous = game.grid[row, col]
+                    if previous:
+                        game.clear_cell(row, col)
+                    success = num != 0 and game.try_move(row, col, num) is None
+                    if previous and not success:
+                        game.try_move(row, col, previous)
+                else:
+                    success = game.clear_cell(row, col)
+                completed = game.is_complete() and game.is_valid_solution()
             
             response_data = {
                 'success': success,
@@ -487,28 +1210,257 @@ class SudokuWebServer(http.server.SimpleHTTPRequestHandler):
             self.send_error(404)
             return
         
+        self.send_json(response_data)
+    
+    def check_rate_limit(self):
+        # Returns False after sending a 429
+        limiter = self.server.rate_limiter
+        if limiter is None:
+            return True
+        wait = limiter.acquire(self.client_key())
+        if not wait:
+            return True
+        self.server.metrics.rejections.inc('rate_limited')
+        self.send_json({'error': 'Too many requests, slow down.'}, 429,
+                       {'Retry-After': retry_after(wait)})
+        return False
+    
+    def client_key(self):
+        # The proxy appends the address it saw to X-Forwarded-For; earlier
+        # entries come from the client and cannot be trusted
+        if self.server.trust_forwarded_for:
+            forwarded = self.headers.get('X-Forwarded-For')
+            if forwarded:
+                return forwarded.rsplit(',', 1)[-1].strip()
+        return self.client_address[0]
+    
+    def generate_puzzle(self, game, difficulty):
+        # Generates inline within the server's generation queue and compute
+        # budget. Returns False after sending a 503.
+        server = self.server
+        if not server.generation_queue.acquire(server.generation_wait):
+            server.metrics.rejections.inc('queue_full')
+            self.send_json({'error': 'The server is busy, try again shortly.'}, 503,
+                           {'Retry-After': retry_after(server.generation_wait)})
+            return False
+        
+        stats = SolverStats()
+        start = time.perf_counter()
+        deadline = start + server.generation_budget if server.generation_budget else None
+        # The slot is released before any response goes out, so a client
+        # never sees its own finished request still holding it
+        try:
+            game.create_puzzle(difficulty, stats=stats, deadline=deadline)
+            timed_out = False
+        except TimeoutError:
+            timed_out = True
+        finally:
+            server.generation_queue.release()
+        if timed_out:
+            server.metrics.rejections.inc('budget_exceeded')
+            self.send_json({'error': 'Puzzle generation took too long, try again.'}, 503,
+                           {'Retry-After': retry_after(server.generation_budget)})
+            return False
+        server.metrics.record_generation(difficulty, time.perf_counter() - start, stats)
+        return True
+    
+    def wire_format(self, query):
+        # ?format=... wins over a format parameter in the Accept header, e.g.
+        # "Accept: application/json; format=packed". None if unsupported.
+        wire_format = urllib.parse.parse_qs(query).get('format', [None])[0]
+        if wire_format is None:
+            for media_range in self.headers.get('Accept', '').split(','):
+                for param in media_range.split(';')[1:]:
+                    name, _, value = param.partition('=')
+                    if name.strip().lower() == 'format':
+                        wire_format = value.strip().strip('"').lower()
+        wire_format = wire_format or 'rows'
+        return wire_format if wire_format in WIRE_FORMATS else None
+    
+    def handle_batch(self):
+        # Accepts a JSON array or NDJSON of puzzles, each an 81-character
+        # string or a 9x9 array, and streams one NDJSON result per puzzle as
+        # its chunk finishes. Add ?ordered=1 to get results in input order.
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        solver = query.get('solver', ['bitmask'])[0]
+        ordered = query.get('ordered', ['0'])[0] not in ('0', 'false', '')
+        
+        post_data = self.read_body(MAX_BATCH_BODY_SIZE)
+        if post_data is None:
+            return
+        if url.path not in ('/api/solve_batch', '/api/validate_batch'):
+            self.send_error(404)
+            return
+        if solver not in sudoku_solver.SOLVERS:
+            self.send_json({'error': f'Unknown solver {solver!r}.'}, 400)
+            return
+        if not self.check_rate_limit():
+            return
+        try:
+            puzzles = parse_batch(post_data.decode())
+        except ValueError:
+            self.send_json({'error': 'Body must be a JSON array or NDJSON of puzzles.'}, 400)
+            return
+        if len(puzzles) > MAX_BATCH_SIZE:
+            self.send_json({'error': f'At most {MAX_BATCH_SIZE} puzzles per batch.'}, 413)
+            return
+        
+        executor = self.server.batch_executor()
+        workers = 1 if executor is None else self.server.batch_workers
+        if url.path == '/api/solve_batch':
+            results = sudoku_batch.solve_stream(puzzles, workers, ordered, solver,
+                                                BATCH_CHUNK_SIZE, executor)
+        else:
+            results = sudoku_batch.validate_stream(puzzles, workers, ordered,
+                                                   BATCH_CHUNK_SIZE, executor)
+        
+        chunked = self.protocol_version == 'HTTP/1.1'
         self.send_response(200)
+        self.send_header('Content-type', 'application/x-ndjson')
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.close_connection = True
+        self.end_headers()
+        
+        buffer = []
+        try:
+            for index, status, solution in results:
+                line = {'index': index, 'status': status}
+                if url.path == '/api/solve_batch':
+                    line['solution'] = solution
+                buffer.append(json.dumps(line))
+                if len(buffer) >= BATCH_CHUNK_SIZE:
+                    self.write_stream(buffer, chunked)
+            self.write_stream(buffer, chunked)
+            if chunked:
+                self.wfile.write(b'0\r\n\r\n')
+        finally:
+            results.close()
+    
+    def write_stream(self, lines, chunked):
+        if not lines:
+            return
+        data = ('\n'.join(lines) + '\n').encode()
+        lines.clear()
+        if chunked:
+            data = b'%x\r\n%s\r\n' % (len(data), data)
+        self.wfile.write(data)
+    
+    def send_json(self, data, status=200, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
-        self.wfile.write(json.dumps(response_data).encode())
+        self.wfile.write(body)
 
-def start_server():
-    PORT = 8000
-    with socketserver.TCPServer(("", PORT), SudokuWebServer) as httpd:
-        print(f"🎮 Sudoku Web App running at http://localhost:{PORT}")
+def start_server(host="", port=8000, workers=32, open_browser=True,
+                 max_sessions=10000, session_ttl=3600, pool_size=20, pool_file=None,
+                 keep_alive=True, idle_timeout=15, max_keepalive_requests=100,
+                 batch_workers=None, access_log=None, rate_limit=2.0, rate_burst=10,
+                 max_generations=2, generation_budget=2.0, max_queued_connections=None,
+                 trust_forwarded_for=False):
+    sessions = SessionStore(max_sessions=max_sessions, ttl=session_ttl)
+    pool = PuzzlePool(size=pool_size, path=pool_file) if pool_size > 0 else None
+    if access_log == "-":
+        log = AccessLog(sys.stderr)
+    elif access_log:
+        log = AccessLog(open(access_log, "a"))
+    else:
+        log = None
+    with SudokuHTTPServer((host, port), SudokuWebServer, workers=workers,
+                          sessions=sessions, pool=pool, keep_alive=keep_alive,
+                          idle_timeout=idle_timeout,
+                          max_keepalive_requests=max_keepalive_requests,
+                          batch_workers=batch_workers, access_log=log,
+                          rate_limit=rate_limit, rate_burst=rate_burst,
+                          max_generations=max_generations,
+                          generation_budget=generation_budget,
+                          max_queued_connections=max_queued_connections,
+                          trust_forwarded_for=trust_forwarded_for) as httpd:
+        port = httpd.server_address[1]
+        print(f"🎮 Sudoku Web App running at http://localhost:{port} ({workers} worker threads)")
+        if pool is not None:
+            pool.start()
+            print(f"Keeping {pool_size} ready puzzles per difficulty")
         print("Press Ctrl+C to stop the server")
         
         # Open browser automatically
-        def open_browser():
-            time.sleep(1)
-            webbrowser.open(f'http://localhost:{PORT}')
-        
-        threading.Thread(target=open_browser, daemon=True).start()
+        if open_browser:
+            def launch_browser():
+                time.sleep(1)
+                webbrowser.open(f'http://localhost:{port}')
+            
+            threading.Thread(target=launch_browser, daemon=True).start()
         
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\n👋 Server stopped")
+        finally:
+            if pool is not None:
+                pool.stop()
+            if log is not None:
+                log.close()
+                if log.stream is not sys.stderr:
+                    log.stream.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sudoku web server")
+    parser.add_argument("--host", default="", help="interface to bind (default: all)")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=32,
+                        help="request handler threads (default: 32)")
+    parser.add_argument("--no-browser", action="store_true",
+                        help="do not open a browser window")
+    parser.add_argument("--max-sessions", type=int, default=10000,
+                        help="games kept in memory before the least recently used is evicted")
+    parser.add_argument("--session-ttl", type=float, default=3600,
+                        help="seconds an idle game is kept (default: 3600)")
+    parser.add_argument("--pool-size", type=int, default=20,
+                        help="ready puzzles kept per difficulty, 0 to generate on demand")
+    parser.add_argument("--pool-file",
+                        help="save the puzzle pool here on exit and reload it on start")
+    parser.add_argument("--max-queued-connections", type=int, default=None,
+                        help="requests waiting for a worker before new ones get a 503 "
+                             "(default: 4 per worker)")
+    parser.add_argument("--no-keep-alive", action="store_true",
+                        help="speak HTTP/1.0 and close the connection after each response")
+    parser.add_argument("--idle-timeout", type=float, default=15,
+                        help="seconds an idle kept-alive connection stays open (default: 15)")
+    parser.add_argument("--max-keepalive-requests", type=int, default=100,
+                        help="responses per connection before it is closed (default: 100)")
+    parser.add_argument("--batch-workers", type=int, default=None,
+                        help="processes for the batch endpoints (default: one per CPU)")
+    parser.add_argument("--access-log", metavar="PATH",
+                        help="write a buffered request log to PATH, or '-' for stderr (default: off)")
+    parser.add_argument("--rate-limit", type=float, default=2.0,
+                        help="new games and batches per second per client, 0 for no limit (default: 2)")
+    parser.add_argument("--rate-burst", type=int, default=10,
+                        help="requests a client may make at once before the rate limit applies")
+    parser.add_argument("--trust-forwarded-for", action="store_true",
+                        help="rate limit by the X-Forwarded-For address; only behind a reverse proxy")
+    parser.add_argument("--max-generations", type=int, default=2,
+                        help="puzzles generated at once when the pool runs dry (default: 2)")
+    parser.add_argument("--generation-budget", type=float, default=2.0,
+                        help="seconds a single puzzle generation may take, 0 for no limit")
+    args = parser.parse_args(argv)
+    if args.max_sessions < 1:
+        parser.error("--max-sessions must be at least 1")
+    start_server(args.host, args.port, args.workers, open_browser=not args.no_browser,
+                 max_sessions=args.max_sessions, session_ttl=args.session_ttl,
+                 pool_size=args.pool_size, pool_file=args.pool_file,
+                 keep_alive=not args.no_keep_alive, idle_timeout=args.idle_timeout,
+                 max_keepalive_requests=args.max_keepalive_requests,
+                 batch_workers=args.batch_workers, access_log=args.access_log,
+                 rate_limit=args.rate_limit, rate_burst=args.rate_burst,
+                 max_generations=args.max_generations, generation_budget=args.generation_budget,
+                 max_queued_connections=args.max_queued_connections,
+                 trust_forwarded_for=args.trust_forwarded_for)
 
 if __name__ == "__main__":
-    start_server()
\ No newline at end of file
+    main()